@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hashers(settings):
+    """Под pytest пароли хешируются так же дёшево, как в manage.py test."""
+    from core.testing import fast_password_hashers
+
+    settings.PASSWORD_HASHERS = fast_password_hashers()
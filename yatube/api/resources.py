@@ -0,0 +1,158 @@
+from django.core.files.storage import default_storage
+
+from posts.fragments import after_cursor, make_cursor
+from posts.models import Comment, Group, Post, User
+
+
+def image_url(name):
+    return default_storage.url(name) if name else None
+
+
+class Resource:
+    """Поля ресурса API и колонки базы, из которых они берутся.
+
+    Строки читаются через values_list только нужных колонок и
+    превращаются в словари одним dict(zip(...)) на строку, без
+    экземпляров моделей и сериализатора на каждое поле.
+    """
+
+    def __init__(self, model, fields, relations=None, transforms=None,
+                 order=None):
+        self.model = model
+        self.fields = fields
+        # Поле -> ресурс, который можно встроить вместо id через include.
+        self.relations = relations or {}
+        # Поле -> функция, которой обрабатывается значение колонки.
+        self.transforms = transforms or {}
+        # Поле даты для курсора; без него лента идёт по возрастанию pk.
+        self.order = order
+
+    def parse_fields(self, value):
+        if not value:
+            return list(self.fields)
+        names = list(dict.fromkeys(name for name in value.split(',') if name))
+        unknown = set(names) - set(self.fields)
+        if unknown:
+            raise ValueError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+        return names
+
+    def parse_include(self, value):
+        names = [name for name in (value or '').split(',') if name]
+        unknown = set(names) - set(self.relations)
+        if unknown:
+            raise ValueError(
+                f'Нельзя встроить: {", ".join(sorted(unknown))}'
+            )
+        return names
+
+    def columns(self, names, extra=()):
+        return [self.fields[name] for name in names] + list(extra)
+
+    def serialize(self, rows, names, include=()):
+        # zip отбрасывает служебные колонки в конце строки.
+        items = [dict(zip(names, row)) for row in rows]
+        for name, transform in self.transforms.items():
+            if name in names:
+                for item in items:
+                    item[name] = transform(item[name])
+        for name in include:
+            related = self.relations[name].by_id(
+                {item[name] for item in items} - {None}
+            )
+            for item in items:
+                item[name] = related.get(item[name])
+        return items
+
+    def by_id(self, ids):
+        if not ids:
+            return {}
+        names = list(self.fields)
+        rows = self.model.objects.filter(pk__in=ids).values_list(
+            *self.columns(names)
+        )
+        return {item['id']: item for item in self.serialize(rows, names)}
+
+    def detail(self, queryset, fields, include):
+        names, include = self.selection(fields, include)
+        rows = queryset.values_list(*self.columns(names))[:1]
+        items = self.serialize(rows, names, include)
+        return items[0] if items else None
+
+    def page(self, queryset, fields, include, cursor, limit):
+        """Порция ленты после курсора и курсор следующей порции."""
+        names, include = self.selection(fields, include)
+        if self.order:
+            queryset = queryset.order_by(f'-{self.order}', '-pk')
+            if cursor:
+                queryset = queryset.filter(after_cursor(self.order, cursor))
+            extra = (self.order, 'pk')
+        else:
+            queryset = queryset.order_by('pk')
+            if cursor:
+                if not cursor.isdigit():
+                    raise ValueError(f'Неверный курсор {cursor!r}')
+                queryset = queryset.filter(pk__gt=int(cursor))
+            extra = ('pk',)
+        rows = list(
+            queryset.values_list(*self.columns(names, extra))[:limit + 1]
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = (
+                make_cursor(last[-2], last[-1]) if self.order
+                else str(last[-1])
+            )
+        return self.serialize(rows, names, include), next_cursor
+
+    def selection(self, fields, include):
+        names = self.parse_fields(fields)
+        include = self.parse_include(include)
+        # Встраиваемая связь попадает в ответ, даже если её нет в fields.
+        names += [name for name in include if name not in names]
+        return names, include
+
+
+users = Resource(User, {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+})
+
+groups = Resource(Group, {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+})
+
+posts = Resource(
+    Post,
+    {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'image': 'image',
+        'views': 'views',
+        'author': 'author_id',
+        'group': 'group_id',
+    },
+    relations={'author': users, 'group': groups},
+    transforms={'image': image_url},
+    order='pub_date',
+)
+
+comments = Resource(
+    Comment,
+    {
+        'id': 'id',
+        'text': 'text',
+        'created': 'created',
+        'author': 'author_id',
+        'post': 'post_id',
+    },
+    relations={'author': users},
+    order='created',
+)
@@ -0,0 +1,244 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import versions
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_PER_PAGE=2)
+class ReadApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(3)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        return response, response.json()
+
+    def walk(self, url, **params):
+        """id всех элементов списка по цепочке next."""
+        ids = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [item['id'] for item in data['results']]
+            url, params = data['next'], {}
+        return ids
+
+    def test_post_lists_walk_by_cursor(self):
+        expected = [post.pk for post in reversed(self.posts)]
+        self.client.force_login(self.reader)
+        for url in (
+            reverse('api:post_list'),
+            reverse('api:group_posts', args=['group']),
+            reverse('api:profile_posts', args=['author']),
+            reverse('api:follow_posts'),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(url), expected)
+
+    def test_groups_and_comments(self):
+        self.assertEqual(
+            self.walk(reverse('api:group_list')), [self.group.pk]
+        )
+        url = reverse('api:post_comments', args=[self.posts[0].pk])
+        _, data = self.get(url, include='author')
+        self.assertEqual(data['results'][0]['text'], 'Комментарий')
+        self.assertEqual(data['results'][0]['author']['username'], 'reader')
+        _, data = self.get(reverse('api:group_detail', args=['group']))
+        self.assertEqual(data['title'], 'Группа')
+        _, data = self.get(reverse('api:profile_detail', args=['author']))
+        self.assertEqual(data['last_name'], 'Толстой')
+
+    def test_sparse_fields_and_include(self):
+        post = self.posts[0]
+        url = reverse('api:post_detail', args=[post.pk])
+        _, data = self.get(url, fields='id,text')
+        self.assertEqual(data, {'id': post.pk, 'text': 'Пост 0'})
+        _, data = self.get(url, fields='id', include='author,group')
+        self.assertEqual(data, {
+            'id': post.pk,
+            'author': {
+                'id': self.author.pk,
+                'username': 'author',
+                'first_name': 'Лев',
+                'last_name': 'Толстой',
+            },
+            'group': {
+                'id': self.group.pk,
+                'slug': 'group',
+                'title': 'Группа',
+                'description': 'Описание',
+            },
+        })
+        _, data = self.get(url)
+        self.assertEqual(data['author'], self.author.pk)
+        self.assertIsNone(data['image'])
+
+    def test_list_query_count(self):
+        url = reverse('api:post_list')
+        # Посты, авторы и группы — по одному запросу на порцию.
+        with self.assertNumQueries(3):
+            self.client.get(url, {'include': 'author,group'})
+
+    def test_bad_requests(self):
+        url = reverse('api:post_list')
+        for params in (
+            {'fields': 'id,password'},
+            {'include': 'comments'},
+            {'cursor': 'bad'},
+            {'limit': 0},
+            {'limit': 'x'},
+        ):
+            with self.subTest(params=params):
+                response, data = self.get(url, **params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', data)
+        response, _ = self.get(reverse('api:post_detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+        response, _ = self.get(reverse('api:follow_posts'))
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 405)
+
+    def test_conditional_get(self):
+        url = reverse('api:post_list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'no-cache, public')
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    # Лента подписок не должна попасть в общий кеш
+    def test_follow_feed_is_private(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('api:follow_posts'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-cache, private')
+
+    def test_cache_follows_feed_invalidation(self):
+        url = reverse('api:post_list')
+        etag = self.client.get(url)['ETag']
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+        versions.bump(*versions.post_scopes(post))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['id'], post.pk)
+
+
+class BatchApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def send(self, name, data):
+        response = self.client.post(
+            reverse(f'api:{name}'), data, content_type='application/json'
+        )
+        return response, response.json()
+
+    def test_creates_posts_in_order(self):
+        response, data = self.send('post_batch', {'posts': [
+            {'text': 'Первый', 'group': self.group.pk},
+            {'text': 'Второй'},
+        ]})
+        self.assertEqual(response.status_code, 201)
+        created = Post.objects.in_bulk(data['created'])
+        self.assertEqual(
+            [created[pk].text for pk in data['created']],
+            ['Первый', 'Второй']
+        )
+        self.assertEqual(created[data['created'][0]].group, self.group)
+        self.assertEqual(created[data['created'][1]].author, self.author)
+
+    def test_invalid_batch_saves_nothing(self):
+        response, data = self.send('post_batch', {'posts': [
+            {'text': 'Хороший'},
+            {'text': ''},
+            {'text': 'Чужая группа', 'group': 999},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(data['errors']), {'1', '2'})
+        self.assertIn('text', data['errors']['1'])
+        self.assertIn('group', data['errors']['2'])
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_adds_comments(self):
+        response, data = self.send('comment_batch', {'comments': [
+            {'post': self.post.pk, 'text': 'Раз'},
+            {'post': self.post.pk, 'text': 'Два'},
+        ]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(self.post.comments.order_by('pk').values_list('pk', 'text')),
+            list(zip(data['created'], ['Раз', 'Два']))
+        )
+
+    def test_unknown_post_rejected(self):
+        response, data = self.send('comment_batch', {'comments': [
+            {'post': self.post.pk, 'text': 'Раз'},
+            {'post': 999, 'text': ''},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(data['errors']['1']), {'post', 'text'})
+        self.assertFalse(Comment.objects.exists())
+
+    @override_settings(API={'max_limit': 100, 'timeout': 60,
+                            'batch_limit': 2})
+    def test_limits_and_auth(self):
+        response, _ = self.send('post_batch', {'posts': [{'text': 'x'}] * 3})
+        self.assertEqual(response.status_code, 400)
+        response, _ = self.send('post_batch', {'posts': []})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.client.get(reverse('api:post_batch')).status_code, 405
+        )
+        self.client.logout()
+        response, _ = self.send('post_batch', {'posts': [{'text': 'x'}]})
+        self.assertEqual(response.status_code, 401)
+
+    def test_batch_invalidates_once(self):
+        with mock.patch.object(versions, 'bump_on_commit') as bump:
+            self.send('post_batch', {'posts': [
+                {'text': 'Первый', 'group': self.group.pk},
+                {'text': 'Второй', 'group': self.group.pk},
+            ]})
+        bump.assert_called_once()
+        scopes = bump.call_args[0]
+        self.assertEqual(len(scopes), len(set(scopes)))
+        self.assertIn(versions.ALL_POSTS, scopes)
+        self.assertIn(versions.group_scope(self.group.pk), scopes)
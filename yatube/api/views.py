@@ -0,0 +1,241 @@
+import json
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+)
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET, require_POST
+
+from core.ratelimit import ratelimit
+from posts import batch, follows, versions
+from posts.lookups import get_group_or_404, get_user_or_404
+from posts.models import Comment, Group, Post, User
+
+from . import resources
+
+API_KEY = 'api:{}'
+
+
+def dump(data):
+    return json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False,
+        separators=(',', ':')
+    ).encode()
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def respond(request, scopes, build, private=False):
+    """JSON-ответ с кешем и условным GET.
+
+    Тело кешируется по адресу запроса и версиям областей scopes: их
+    меняют те же события, что сбрасывают кеш HTML-лент
+    (posts.versions). ETag — хеш тела, поэтому повторный запрос с
+    If-None-Match получает 304 без тела.
+    """
+    parts = [request.get_full_path(), *versions.current(*scopes)]
+    if private:
+        parts.append(str(request.user.pk))
+    key = API_KEY.format(md5('|'.join(parts).encode()).hexdigest())
+    cached = cache.get(key)
+    if cached is None:
+        try:
+            data = build()
+        except ValueError as exc:
+            return error(str(exc), 400)
+        body = dump(data)
+        cached = (f'"{md5(body).hexdigest()}"', body)
+        cache.set(key, cached, settings.API['timeout'])
+    etag, body = cached
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # patch_cache_control пишет и False как директиву («public=False»),
+    # поэтому передаём только ту, что верна.
+    patch_cache_control(
+        response, no_cache=True,
+        **({'private': True} if private else {'public': True})
+    )
+    return response
+
+
+def limit(request):
+    try:
+        value = int(request.GET.get('limit', settings.POSTS_PER_PAGE))
+    except ValueError:
+        raise ValueError('limit должен быть числом')
+    if not 1 <= value <= settings.API['max_limit']:
+        raise ValueError(f'limit от 1 до {settings.API["max_limit"]}')
+    return value
+
+
+def listing(request, resource, queryset):
+    def build():
+        items, cursor = resource.page(
+            queryset,
+            request.GET.get('fields'),
+            request.GET.get('include'),
+            request.GET.get('cursor'),
+            limit(request),
+        )
+        next_url = None
+        if cursor:
+            query = request.GET.copy()
+            query['cursor'] = cursor
+            next_url = f'{request.path}?{query.urlencode()}'
+        return {'results': items, 'next': next_url}
+    return build
+
+
+def detail(request, resource, queryset):
+    def build():
+        item = resource.detail(
+            queryset, request.GET.get('fields'), request.GET.get('include')
+        )
+        if item is None:
+            raise Http404
+        return item
+    return build
+
+
+def api_view(view):
+    """Только GET, 404 в JSON, а не страницей сайта."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return error('Не найдено', 404)
+    return wrapper
+
+
+@api_view
+def post_list(request):
+    return respond(
+        request, [versions.ALL_POSTS],
+        listing(request, resources.posts, Post.objects.all())
+    )
+
+
+@api_view
+def post_detail(request, post_id):
+    return respond(
+        request, [versions.post_scope(post_id)],
+        detail(request, resources.posts, Post.objects.filter(pk=post_id))
+    )
+
+
+@api_view
+def post_comments(request, post_id):
+    return respond(
+        request, [versions.post_scope(post_id)],
+        listing(
+            request, resources.comments,
+            Comment.objects.filter(post_id=post_id)
+        )
+    )
+
+
+@api_view
+def group_list(request):
+    return respond(
+        request, [versions.ALL_GROUPS],
+        listing(request, resources.groups, Group.objects.all())
+    )
+
+
+@api_view
+def group_detail(request, slug):
+    return respond(
+        request, [versions.ALL_GROUPS],
+        detail(request, resources.groups, Group.objects.filter(slug=slug))
+    )
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_group_or_404(slug)
+    return respond(
+        request, [versions.group_scope(group.pk)],
+        listing(request, resources.posts, Post.objects.filter(group=group))
+    )
+
+
+@api_view
+def profile_detail(request, username):
+    author = get_user_or_404(username)
+    return respond(
+        request, [versions.author_scope(author.pk)],
+        detail(
+            request, resources.users,
+            User.objects.filter(pk=author.pk)
+        )
+    )
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_user_or_404(username)
+    return respond(
+        request, [versions.author_scope(author.pk)],
+        listing(request, resources.posts, Post.objects.filter(author=author))
+    )
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return error('Нужна авторизация', 401)
+    posts = follows.followed_posts(request.user)
+    return respond(
+        request,
+        [versions.ALL_POSTS, versions.following_scope(request.user.pk)],
+        listing(request, resources.posts, posts),
+        private=True,
+    )
+
+
+def batch_view(create, key):
+    """POST-ручка, создающая пачку объектов из JSON {key: [...]}.
+
+    Элементы проверяются теми же формами, что и на сайте, и пишутся
+    одним bulk_create в одной транзакции; кеши и ленты обновляются один
+    раз на пачку.
+    """
+    @ratelimit('api_batch')
+    @require_POST
+    def view(request):
+        if not request.user.is_authenticated:
+            return error('Нужна авторизация', 401)
+        try:
+            items = json.loads(request.body)[key]
+        except (ValueError, KeyError, TypeError):
+            return error(f'Ожидается JSON-объект со списком {key}', 400)
+        if not isinstance(items, list) or not items:
+            return error(f'{key} должен быть непустым списком', 400)
+        if len(items) > settings.API['batch_limit']:
+            return error(
+                f'Не больше {settings.API["batch_limit"]} элементов', 400
+            )
+        try:
+            objects = create(request.user, items)
+        except batch.BatchError as exc:
+            return JsonResponse({'errors': exc.errors}, status=400)
+        return JsonResponse(
+            {'created': [obj.pk for obj in objects]}, status=201
+        )
+    return view
+
+
+post_batch = batch_view(batch.create_posts, 'posts')
+comment_batch = batch_view(batch.add_comments, 'comments')
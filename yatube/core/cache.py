@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from . import metrics
+
+
+class TwoTierCache:
+    """Кеш объектов: LRU в памяти процесса поверх общего кеша Django.
+
+    Локальный уровень ограничен по размеру и живёт ttl секунд, так что
+    изменения, сделанные другими процессами, видны не позже чем через ttl.
+    """
+
+    def __init__(self, name, maxsize, ttl, timeout):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared_key(self, key):
+        return f'two-tier:{self.name}:{key}'
+
+    def get_or_load(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] > now:
+                self._local.move_to_end(key)
+                self._count('local_hit')
+                return entry[1]
+        value = cache.get(self._shared_key(key))
+        if value is not None:
+            self._count('shared_hit')
+        else:
+            self._count('miss')
+            value = loader()
+            if value is None:
+                return None
+            cache.set(self._shared_key(key), value, self.timeout)
+        self._store(key, value, now)
+        return value
+
+    def _store(self, key, value, now):
+        with self._lock:
+            self._local[key] = (now + self.ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+        cache.delete(self._shared_key(key))
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def _count(self, result):
+        metrics.increment(
+            'lookup_cache_requests_total', cache=self.name, result=result
+        )
@@ -0,0 +1,184 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """Подписка на события нескольких каналов.
+
+    wait() возвращает список событий (id, канал, данные) с id больше
+    последнего полученного или пустой список по истечении timeout.
+    """
+
+    def wait(self, timeout):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LocalSubscription(Subscription):
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.queue = queue.SimpleQueue()
+
+    def wait(self, timeout):
+        try:
+            events = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Рассылка событий внутри одного процесса.
+
+    Подходит для тестов и сервера из одного процесса. Подписка —
+    это очередь и запись в словаре каналов, поэтому тысячи ждущих
+    соединений почти ничего не стоят.
+    """
+
+    def __init__(self, history=100):
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.channels = {}
+        # Последние события для переподключения с Last-Event-ID.
+        self.history = deque(maxlen=history)
+
+    def publish(self, channel, data):
+        with self.lock:
+            event = (next(self.ids), channel, data)
+            self.history.append(event)
+            subscribers = list(self.channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.queue.put(event)
+        return event[0]
+
+    def subscribe(self, channels, last_id=None):
+        subscription = LocalSubscription(self, channels)
+        with self.lock:
+            for channel in subscription.channels:
+                self.channels.setdefault(channel, set()).add(subscription)
+            if last_id is not None:
+                for event in self.history:
+                    if event[0] > last_id and event[1] in channels:
+                        subscription.queue.put(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.channels[channel]
+
+
+class CacheSubscription(Subscription):
+    def __init__(self, broker, channels, last_id):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.last_id = broker.resume_from(last_id)
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            self.last_id, events = self.broker.events_after(self.last_id)
+            events = [event for event in events if event[1] in self.channels]
+            if events:
+                return events
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            time.sleep(min(self.broker.poll, remaining))
+
+
+class CacheBroker:
+    """Рассылка событий через общий кеш для нескольких процессов и узлов.
+
+    События нумеруются счётчиком в кеше и хранятся history секунд;
+    подписчики опрашивают кеш раз в poll секунд. За один опрос
+    читается не больше backlog последних событий.
+    """
+    SEQUENCE_KEY = 'events:sequence'
+    EVENT_KEY = 'events:event:{}'
+
+    def __init__(self, history=60, poll=1, backlog=1000):
+        self.history = history
+        self.poll = poll
+        self.backlog = backlog
+
+    def last_id(self):
+        return cache.get(self.SEQUENCE_KEY, 0)
+
+    def resume_from(self, last_id):
+        """Номер, с которого продолжать после Last-Event-ID клиента.
+
+        Номер приходит от клиента: слишком старый сжимается до backlog
+        последних событий, иначе один запрос строил бы get_many на
+        миллионы ключей, а номер из будущего заменяется текущим, иначе
+        подписка молчала бы, пока счётчик его не догонит.
+        """
+        current = self.last_id()
+        if last_id is None or last_id > current:
+            return current
+        return max(last_id, current - self.backlog)
+
+    def publish(self, channel, data):
+        cache.add(self.SEQUENCE_KEY, 0, None)
+        event_id = cache.incr(self.SEQUENCE_KEY)
+        cache.set(
+            self.EVENT_KEY.format(event_id), (channel, data), self.history
+        )
+        return event_id
+
+    def events_after(self, last_id):
+        """Номер последнего события и все ещё хранящиеся после last_id."""
+        current = self.last_id()
+        if current <= last_id:
+            return last_id, []
+        last_id = max(last_id, current - self.backlog)
+        keys = [
+            self.EVENT_KEY.format(event_id)
+            for event_id in range(last_id + 1, current + 1)
+        ]
+        found = cache.get_many(keys)
+        events = []
+        for event_id, key in enumerate(keys, start=last_id + 1):
+            if key in found:
+                channel, data = found[key]
+                events.append((event_id, channel, data))
+        return current, events
+
+    def subscribe(self, channels, last_id=None):
+        return CacheSubscription(self, channels, last_id)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    config = dict(settings.EVENT_BROKER)
+    return import_string(config.pop('BACKEND'))(**config)
+
+
+@receiver(setting_changed)
+def event_broker_changed(*, setting, **kwargs):
+    if setting == 'EVENT_BROKER':
+        get_broker.cache_clear()
@@ -0,0 +1,183 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Предсжатые варианты файла в порядке предпочтения.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Файл, из которого можно прочитать только length байт от start.
+
+    fileno() отдаёт дескриптор исходного файла, уже сдвинутый на start:
+    WSGI-сервер с wsgi.file_wrapper (например, gunicorn) передаёт такой
+    диапазон через os.sendfile без копирования в Python.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return etag in (tag.strip() for tag in if_none_match.split(','))
+    since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    return since is not None and int(mtime) <= since
+
+
+def requested_range(request, etag, size):
+    """Запрошенный диапазон (start, end) включительно.
+
+    None — отдать файл целиком, False — диапазон невыполним (416).
+    Поддерживается один диапазон; составные запросы отдаются целиком.
+    """
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+    if match is None:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is not None and if_range.strip() != etag:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            return False
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        return False
+    return start, end
+
+
+def accepted_encodings(header):
+    """Accept-Encoding -> {кодировка: q}. Кодировки с q=0 запрещены."""
+    accepted = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.lower()] = quality
+    return accepted
+
+
+def precompressed(request, fullpath):
+    """Путь к предсжатому варианту, который примет клиент, и его кодировка.
+
+    Из кодировок с q > 0 выбирается та, у которой q больше; при равных
+    — по порядку ENCODINGS. «*» относится ко всем неназванным.
+    """
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    wildcard = accepted.get('*', 0.0)
+    candidates = [
+        (accepted.get(encoding, wildcard), -order, encoding, suffix)
+        for order, (encoding, suffix) in enumerate(ENCODINGS)
+    ]
+    for quality, _, encoding, suffix in sorted(candidates, reverse=True):
+        if quality > 0 and os.path.isfile(fullpath + suffix):
+            return fullpath + suffix, encoding
+    return fullpath, None
+
+
+def serve_file(request, fullpath, cache_control, compressed=False,
+               content_type=None):
+    """Отдаёт файл с ETag/Last-Modified, Range и заголовками кеширования.
+
+    Тело отдаётся через FileResponse, то есть через wsgi.file_wrapper
+    сервера, если он его поддерживает.
+    """
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(fullpath)
+        content_type = content_type or 'application/octet-stream'
+    encoding = None
+    if compressed:
+        fullpath, encoding = precompressed(request, fullpath)
+    stat = os.stat(fullpath)
+    etag = file_etag(stat)
+    byte_range = None
+    if not encoding:
+        byte_range = requested_range(request, etag, stat.st_size)
+    if not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+    elif byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+    elif byte_range is not None:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(open(fullpath, 'rb'), start, end - start + 1),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    else:
+        response = FileResponse(
+            open(fullpath, 'rb'), content_type=content_type
+        )
+        response['Content-Length'] = stat.st_size
+        if encoding:
+            response['Content-Encoding'] = encoding
+    if not encoding:
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control
+    if compressed:
+        response['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def offload_file(path, fullpath, cache_control):
+    """Поручает отдачу файла фронт-серверу (MEDIA_ACCEL).
+
+    Range, ETag и сам файл обрабатывает nginx (X-Accel-Redirect)
+    или Apache/lighttpd (X-Sendfile); приложение файл не читает.
+    """
+    content_type, _ = mimetypes.guess_type(fullpath)
+    response = HttpResponse(
+        content_type=content_type or 'application/octet-stream'
+    )
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+    else:
+        response['X-Sendfile'] = fullpath
+    response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def work_factor(algorithm, name):
+    """Параметр стоимости хеша из PASSWORD_HASHING[algorithm][name].
+
+    Параметры читаются при каждом хешировании, а не при импорте: после
+    их изменения Django при следующем входе пользователя увидит, что
+    хеш устарел (must_update), и перехеширует пароль.
+    """
+    return property(
+        lambda self: settings.PASSWORD_HASHING[algorithm][name]
+    )
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id вместо Argon2i, которым хеширует Django 2.2.
+
+    Параметры PASSWORD_HASHING рассчитаны на Argon2id. Старые хеши
+    Argon2i по-прежнему проверяются и перехешируются при входе.
+    """
+    variety = 'argon2id'
+    time_cost = work_factor('argon2', 'time_cost')
+    memory_cost = work_factor('argon2', 'memory_cost')
+    parallelism = work_factor('argon2', 'parallelism')
+
+    def encode(self, password, salt):
+        argon2 = self._load_library()
+        data = argon2.low_level.hash_secret(
+            password.encode(),
+            salt.encode(),
+            time_cost=self.time_cost,
+            memory_cost=self.memory_cost,
+            parallelism=self.parallelism,
+            hash_len=argon2.DEFAULT_HASH_LENGTH,
+            type=argon2.low_level.Type.ID,
+        )
+        return self.algorithm + data.decode('ascii')
+
+    def verify(self, password, encoded):
+        argon2 = self._load_library()
+        algorithm, rest = encoded.split('$', 1)
+        assert algorithm == self.algorithm
+        if rest.split('$', 1)[0] == self.variety:
+            type_ = argon2.low_level.Type.ID
+        else:
+            type_ = argon2.low_level.Type.I
+        try:
+            return argon2.low_level.verify_secret(
+                ('$' + rest).encode('ascii'), password.encode(), type=type_
+            )
+        except argon2.exceptions.VerificationError:
+            return False
+
+    def must_update(self, encoded):
+        return (
+            self._decode(encoded)[1] != self.variety
+            or super().must_update(encoded)
+        )
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    rounds = work_factor('bcrypt', 'rounds')
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = work_factor('pbkdf2', 'iterations')
@@ -0,0 +1,117 @@
+import base64
+import threading
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from taskqueue.queue import enqueue
+
+SEND_TASK = 'core.send_email'
+# Письма о сбросе пароля и регистрации ждут меньше массовых рассылок.
+PRIORITY = 2
+
+_local = threading.local()
+
+
+def serialize(message):
+    """Письмо в JSON для очереди задач."""
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise ValueError('Вложения MIMEBase не ставятся в очередь')
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            [filename, base64.b64encode(content).decode(), mimetype]
+        )
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': attachments,
+    }
+
+
+def deserialize(data):
+    data = dict(data)
+    alternatives = data.pop('alternatives')
+    attachments = data.pop('attachments')
+    message = EmailMultiAlternatives(**data)
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    for filename, content, mimetype in attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """EMAIL_BACKEND, который не отправляет письма, а ставит их в очередь.
+
+    Запрос тратит на письмо одну вставку в taskqueue, сколько бы ни
+    отвечал почтовый сервер. Отправляют воркеры run_tasks через
+    EMAIL_DELIVERY_BACKEND, повторяя неудачные попытки с растущей
+    паузой.
+    """
+
+    def send_messages(self, email_messages):
+        count = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            enqueue(
+                SEND_TASK, {'message': serialize(message)}, priority=PRIORITY
+            )
+            count += 1
+        return count
+
+
+def delivery_connection():
+    """Открытое соединение EMAIL_DELIVERY_BACKEND потока воркера.
+
+    Соединение живёт между задачами, так что SMTP-сессия открывается
+    один раз на поток, а не на каждое письмо.
+    """
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        connection = get_connection(
+            settings.EMAIL_DELIVERY_BACKEND, fail_silently=False
+        )
+        connection.open()
+        _local.connection = connection
+    return connection
+
+
+def close_delivery_connection():
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def deliver(data):
+    """Отправляет письмо из очереди через открытое соединение.
+
+    Сервер мог закрыть простаивавшее соединение, поэтому после ошибки
+    письмо один раз отправляется через новое; повторная ошибка уходит в
+    очередь, и та повторит задачу позже.
+    """
+    message = deserialize(data)
+    for attempt in range(2):
+        try:
+            delivery_connection().send_messages([message])
+            return
+        except Exception:
+            close_delivery_connection()
+            if attempt:
+                raise
@@ -0,0 +1,52 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import get_hasher, get_hashers
+from django.core.management.base import BaseCommand
+
+PASSWORD = 'correct horse battery staple'
+
+
+def verify(algorithm, encoded, seconds):
+    """Сколько проверок пароля успевает один процесс за seconds."""
+    hasher = get_hasher(algorithm)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        hasher.verify(PASSWORD, encoded)
+        count += 1
+    return count
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность входа на ядро для каждого '
+        'хешера из PASSWORD_HASHERS с параметрами PASSWORD_HASHING'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1
+        )
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        workers = options['workers']
+        self.stdout.write(f'{workers} процессов по {seconds:g} с')
+        with ProcessPoolExecutor(workers) as pool:
+            for hasher in get_hashers():
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+                # Один процесс — цена входа, все сразу — упор в ядра.
+                single = verify(hasher.algorithm, encoded, seconds)
+                total = sum(pool.map(
+                    verify, [hasher.algorithm] * workers,
+                    [encoded] * workers, [seconds] * workers
+                ))
+                self.stdout.write(
+                    f'{hasher.algorithm:<24} '
+                    f'{seconds / single * 1000:8.2f} мс/вход  '
+                    f'{single / seconds:8.1f} вход/с на ядро  '
+                    f'{total / seconds:8.1f} вход/с всего'
+                )
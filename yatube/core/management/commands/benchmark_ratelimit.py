@@ -0,0 +1,64 @@
+import timeit
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core.ratelimit import ratelimit
+
+SCOPE = 'benchmark'
+
+
+def view(request):
+    return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет накладные расходы ограничителя частоты на запрос: '
+        'пропущенный и отклонённый'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        factory = RequestFactory()
+        requests = []
+        for i in range(count):
+            request = factory.post('/')
+            request.session = {SESSION_KEY: str(i % options['users'])}
+            requests.append(request)
+        limited = ratelimit(SCOPE)(view)
+
+        def run(handler):
+            for request in requests:
+                handler(request)
+
+        # Большой лимит пропускает все запросы, лимит 1/h отклоняет их.
+        results = {'без ограничителя': min(
+            timeit.repeat(lambda: run(view), number=1, repeat=3)
+        )}
+        for name, rate in (('пропущен', f'{count * 10}/h'), ('429', '1/h')):
+            with override_settings(RATELIMITS={SCOPE: rate}):
+                cache.clear()
+                run(limited)
+                results[name] = min(
+                    timeit.repeat(lambda: run(limited), number=1, repeat=3)
+                )
+        cache.clear()
+        base = results['без ограничителя']
+        self.stdout.write(
+            f'{count} запросов, {options["users"]} пользователей, '
+            f'кеш {settings.CACHES["default"]["BACKEND"]}'
+        )
+        for name, seconds in results.items():
+            self.stdout.write(
+                f'{name:<17} {seconds / count * 1e6:8.2f} мкс/запрос  '
+                f'(+{(seconds - base) / count * 1e6:.2f})'
+            )
@@ -0,0 +1,27 @@
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+
+
+def increment(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += value
+
+
+def snapshot():
+    with _lock:
+        return dict(_counters)
+
+
+def render():
+    """Счётчики процесса в текстовом формате Prometheus."""
+    lines = []
+    for (name, labels), value in sorted(snapshot().items()):
+        if labels:
+            label_text = ','.join(f'{key}="{val}"' for key, val in labels)
+            name = f'{name}{{{label_text}}}'
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
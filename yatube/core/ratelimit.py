@@ -0,0 +1,153 @@
+import ipaddress
+import math
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from . import metrics
+
+RATELIMIT_KEY = 'ratelimit:{}:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/m' -> (10, 60): limit запросов за period секунд."""
+    count, _, period = rate.partition('/')
+    try:
+        return int(count), PERIODS[period]
+    except (KeyError, ValueError):
+        raise ValueError(f'Неверное правило {rate!r}, нужно вида 10/m')
+
+
+@lru_cache(maxsize=None)
+def trusted_proxies():
+    return tuple(
+        ipaddress.ip_network(proxy, strict=False)
+        for proxy in settings.RATELIMIT_TRUSTED_PROXIES
+    )
+
+
+@receiver(setting_changed)
+def rates_changed(*, setting, **kwargs):
+    if setting == 'RATELIMITS':
+        parse_rate.cache_clear()
+    elif setting == 'RATELIMIT_TRUSTED_PROXIES':
+        trusted_proxies.cache_clear()
+
+
+def increment(key, timeout):
+    """Атомарный счётчик в общем кеше (incr в memcached и Redis)."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def consume(scope, ident, rate, now=None):
+    """Берёт токен из ведра scope/ident; секунды до нового токена или None.
+
+    Ведро вмещает limit токенов и наполняется за period секунд. Хранить
+    остаток и время в кеше пришлось бы через чтение и запись, которые
+    гонятся между процессами, поэтому ведро приближено двумя
+    счётчиками окон по period: из предыдущего окна в расход идёт та
+    доля, что ещё не «натекла» обратно. Запрос стоит один incr и один
+    get, без блокировок.
+    """
+    limit, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    window = int(window)
+    current = increment(
+        RATELIMIT_KEY.format(scope, ident, window), period * 2
+    )
+    previous = cache.get(RATELIMIT_KEY.format(scope, ident, window - 1), 0)
+    remaining = 1 - elapsed / period
+    used = previous * remaining + current
+    if used <= limit:
+        return None
+    if current > limit:
+        return math.ceil(period - elapsed)
+    # Токен освободится, когда доля предыдущего окна станет меньше.
+    return math.ceil((used - limit) / previous * period) if previous else 1
+
+
+def is_trusted(address):
+    try:
+        ip = ipaddress.ip_address(address.strip())
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies())
+
+
+def client_ip(request):
+    """IP клиента с учётом доверенных прокси RATELIMIT_TRUSTED_PROXIES.
+
+    X-Forwarded-For читается справа налево: каждый прокси дописывает в
+    конец адрес, от которого получил запрос, поэтому клиент — первый
+    адрес, не принадлежащий доверенным прокси. Всё левее него мог
+    написать сам клиент.
+    """
+    address = request.META.get('REMOTE_ADDR', '')
+    if not is_trusted(address):
+        return address
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        for hop in reversed(forwarded.split(',')):
+            address = hop.strip()
+            if not is_trusted(address):
+                return address
+        return address
+    return request.META.get('HTTP_X_REAL_IP', '').strip() or address
+
+
+def client_ident(request):
+    """Кому засчитывать запрос: пользователю из сессии или IP.
+
+    id пользователя читается из сессии, а не из request.user, чтобы не
+    загружать пользователя из базы ради отказа. Сессия с движком
+    cached_db приходит из кеша, так что база не нужна и ей.
+    """
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is not None:
+        return f'user:{user_id}'
+    return f'ip:{client_ip(request)}'
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.\n',
+        status=429, content_type='text/plain; charset=utf-8'
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Ограничивает частоту запросов к view правилом RATELIMITS[scope].
+
+    Проверка идёт до самой view и до login_required, поэтому отказ 429
+    обходится без запросов к базе (сессию отдаёт кеш, см. client_ident).
+    methods=None считает запросы любым методом: так ограничиваются view,
+    которые пишут и по GET.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.RATELIMITS.get(scope)
+            if rate and (methods is None or request.method in methods):
+                retry_after = consume(scope, client_ident(request), rate)
+                if retry_after is not None:
+                    metrics.increment('ratelimit_rejected_total', scope=scope)
+                    return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,86 @@
+import gzip
+import io
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.map', '.json')
+MIN_COMPRESS_SIZE = 256
+
+
+def gzip_compress(content):
+    # mtime=0, чтобы повторный collectstatic давал те же байты.
+    buffer = io.BytesIO()
+    with gzip.GzipFile(
+        mode='wb', fileobj=buffer, compresslevel=9, mtime=0
+    ) as file:
+        file.write(content)
+    return buffer.getvalue()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хешированные имена файлов плюс варианты .gz и .br (если есть brotli).
+
+    Адреса для тега static берутся из загруженного в память манифеста
+    и запоминаются. Если collectstatic ещё не запускался, отдаются
+    исходные имена, чтобы разработка и тесты работали без него.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._urls = {}
+        self._hashed_names = None
+
+    def url(self, name, force=False):
+        if force:
+            return super().url(name, force)
+        url = self._urls.get(name)
+        if url is None:
+            url = self._urls[name] = super().url(name)
+        return url
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def is_hashed(self, name):
+        if self._hashed_names is None:
+            self._hashed_names = frozenset(self.hashed_files.values())
+        return name in self._hashed_names
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed = set()
+        for name, hashed_name, result in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(result, Exception):
+                processed.update((name, hashed_name))
+            yield name, hashed_name, result
+        if dry_run:
+            return
+        for name in sorted(processed):
+            self.compress(name)
+        self._urls.clear()
+        self._hashed_names = None
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            content = file.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip_compress(content))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content):
+                with open(path + suffix, 'wb') as file:
+                    file.write(compressed)
@@ -0,0 +1,14 @@
+from taskqueue.queue import register
+
+from .mail import SEND_TASK, deliver
+from .thumbnails import GENERATE_TASK, generate_variants
+
+
+@register(SEND_TASK)
+def send_email(message):
+    deliver(message)
+
+
+@register(GENERATE_TASK)
+def generate_image_variants(name):
+    generate_variants(name)
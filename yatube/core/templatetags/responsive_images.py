@@ -0,0 +1,58 @@
+from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from core.thumbnails import (
+    FALLBACK_FORMAT, MIME_TYPES, fallback_thumbnail, responsive_variants,
+)
+
+register = template.Library()
+
+
+def srcset(variants):
+    return ', '.join(f'{url} {width}w' for width, _, url in variants)
+
+
+@register.simple_tag
+def responsive_image(image, css_class='', alt='', sizes=None):
+    """<picture> с миниатюрами нескольких ширин в современных форматах.
+
+    Браузер сам выбирает формат из <source> и ширину по sizes,
+    а <img> с JPEG остаётся для старых браузеров. Пока миниатюры не
+    готовы, выводится одна JPEG-миниатюра, а если картинку не удалось
+    обработать — исходный файл.
+    """
+    if not image:
+        return ''
+    variants = responsive_variants(image)
+    fallback = variants.get(FALLBACK_FORMAT)
+    if not fallback:
+        thumbnail = fallback_thumbnail(image)
+        if thumbnail is None:
+            return format_html(
+                '<img class="{}" src="{}" loading="lazy" alt="{}">',
+                css_class,
+                default_storage.url(getattr(image, 'name', image)),
+                alt
+            )
+        return format_html(
+            '<img class="{}" src="{}" width="{}" height="{}" '
+            'loading="lazy" alt="{}">',
+            css_class, thumbnail.url, thumbnail.width, thumbnail.height, alt
+        )
+    sizes = sizes or settings.THUMBNAIL_SRCSET_SIZES
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (MIME_TYPES[format_], srcset(format_variants), sizes)
+            for format_, format_variants in variants.items()
+            if format_ != FALLBACK_FORMAT and format_variants
+        )
+    )
+    width, height, url = fallback[-1]
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" '
+        'width="{}" height="{}" loading="lazy" alt="{}"></picture>',
+        sources, css_class, url, srcset(fallback), sizes, width, height, alt
+    )
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+FAST_HASHER = 'django.contrib.auth.hashers.MD5PasswordHasher'
+
+
+def fast_password_hashers():
+    """Хешеры проекта с дешёвым MD5 впереди.
+
+    Фикстуры создают пользователей сотнями, а стойкость хешей в тестах
+    не нужна. Остальные хешеры остаются и проверяют свои хеши.
+    """
+    return [FAST_HASHER, *settings.PASSWORD_HASHERS]
+
+
+class FastHashingRunner(DiscoverRunner):
+    """manage.py test с fast_password_hashers()."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.hashers = override_settings(
+            PASSWORD_HASHERS=fast_password_hashers()
+        )
+        self.hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.hashers.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,526 @@
+import gzip
+import os
+import shutil
+import tempfile
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from core import mail as queued_mail
+from core import hashers, ratelimit, thumbnails
+from core.testing import FAST_HASHER
+from posts.models import Post, User
+from taskqueue.models import Task
+from taskqueue.queue import claim_tasks, execute
+from yatube import settings as project_settings
+
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class StaticPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.css_url = staticfiles_storage.url('css/bootstrap.min.css')
+        self.css_name = self.css_url[len(settings.STATIC_URL):]
+
+    # collectstatic пишет хешированные файлы и их сжатые варианты
+    def test_collectstatic_writes_hashed_and_gzip_files(self):
+        self.assertRegex(self.css_name, r'^css/bootstrap\.min\.\w{12}\.css$')
+        path = os.path.join(STATIC_ROOT, self.css_name)
+        with open(path, 'rb') as plain, open(path + '.gz', 'rb') as packed:
+            self.assertEqual(gzip.decompress(packed.read()), plain.read())
+
+    # Шаблоны ссылаются на хешированные имена
+    def test_templates_use_hashed_urls(self):
+        response = self.client.get('/about/author/')
+        self.assertContains(response, self.css_url)
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        response = self.client.get(
+            self.css_url, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        response.close()
+        response = self.client.get(
+            self.css_url,
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    # Кодировка с q=0 не отдаётся, даже если упомянута в заголовке
+    def test_refused_encodings_are_not_served(self):
+        for header, encoding in (
+            ('gzip;q=0, deflate', None),
+            ('br;q=0, gzip;q=0.8', 'gzip'),
+            ('br;q=0, *', 'gzip'),
+        ):
+            response = self.client.get(
+                self.css_url, HTTP_ACCEPT_ENCODING=header
+            )
+            self.assertEqual(response.get('Content-Encoding'), encoding)
+            response.close()
+
+    def test_unhashed_file_gets_short_cache(self):
+        response = self.client.get(settings.STATIC_URL + 'img/logo.png')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+        response.close()
+
+    def test_path_outside_static_root_is_rejected(self):
+        response = self.client.get(settings.STATIC_URL + '../manage.py')
+        self.assertEqual(response.status_code, 404)
+
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaServingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for directory in ('posts', 'private'):
+            os.makedirs(os.path.join(MEDIA_ROOT, directory))
+            with open(os.path.join(MEDIA_ROOT, directory, 'a.gif'), 'wb') as f:
+                f.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, **headers):
+        response = self.client.get(
+            settings.MEDIA_URL + 'posts/a.gif', **headers
+        )
+        content = b''.join(response.streaming_content) if (
+            response.streaming) else response.content
+        response.close()
+        return response, content
+
+    def test_full_file_with_immutable_cache(self):
+        response, content = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+        response, _ = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    # Проверяем выдачу диапазонов байтов
+    def test_range_requests(self):
+        ranges = {
+            'bytes=10-19': (10, 19),
+            'bytes=1000-': (1000, 1023),
+            'bytes=-24': (1000, 1023),
+            'bytes=1020-5000': (1020, 1023),
+        }
+        for header, (start, end) in ranges.items():
+            with self.subTest(range=header):
+                response, content = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(content, CONTENT[start:end + 1])
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/1024'
+                )
+                self.assertEqual(int(response['Content-Length']), len(content))
+
+    def test_unsatisfiable_and_stale_ranges(self):
+        response, _ = self.get(HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+        response, content = self.get(
+            HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, CONTENT)
+
+    def test_only_public_media_dirs_are_served(self):
+        for path in (
+            'private/a.gif',
+            'posts/../private/a.gif',
+            'posts/./../private/a.gif',
+            'cache/../posts/a.gif',
+        ):
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, 404)
+
+    # Лишние сегменты пути не попадают в адрес для фронт-сервера
+    @override_settings(MEDIA_ACCEL='x-accel-redirect')
+    def test_offload_uses_normalised_name(self):
+        response = self.client.get(settings.MEDIA_URL + 'posts/./a.gif')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.gif'
+        )
+
+    @override_settings(MEDIA_ACCEL='x-accel-redirect')
+    def test_offload_to_front_server(self):
+        response, content = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.gif'
+        )
+        self.assertEqual(content, b'')
+
+
+@override_settings(
+    THUMBNAIL_DUMMY=True,
+    THUMBNAIL_DUMMY_SOURCE='/dummy/%(width)sx%(height)s',
+)
+class ResponsiveImageTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        # sorl пишет в лог каждую ненайденную картинку-источник.
+        patcher = mock.patch('sorl.thumbnail.base.logger')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def render(self, image):
+        return Template(
+            '{% load responsive_images %}'
+            '{% responsive_image image "card-img" %}'
+        ).render(Context({'image': image}))
+
+    # Каждая ширина во всех форматах попадает в srcset
+    @override_settings(TASKS_EAGER=True)
+    def test_srcset_for_every_width_and_format(self):
+        # Первый показ ставит генерацию в очередь и выводит одну
+        # миниатюру наибольшей ширины.
+        self.assertEqual(
+            self.render('posts/missing.jpg'),
+            '<img class="card-img" src="/dummy/960x339" width="960" '
+            'height="339" loading="lazy" alt="">'
+        )
+        html = self.render('posts/missing.jpg')
+        self.assertIn('<source type="image/webp"', html)
+        widths = settings.THUMBNAIL_SRCSET_WIDTHS
+        srcset = ', '.join(
+            f'/dummy/{width}x{round(width * 339 / 960)} {width}w'
+            for width in widths
+        )
+        self.assertEqual(html.count(f'srcset="{srcset}"'), 2)
+        self.assertIn('src="/dummy/960x339"', html)
+        self.assertIn('width="960" height="339"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn(f'sizes="{settings.THUMBNAIL_SRCSET_SIZES}"', html)
+
+    # Промах создаёт в запросе только запасную миниатюру и ставит одну
+    # задачу
+    def test_miss_enqueues_generation_once(self):
+        with mock.patch.object(
+            thumbnails, 'get_thumbnail', wraps=thumbnails.get_thumbnail
+        ) as get:
+            self.render('posts/missing.jpg')
+            self.render('posts/missing.jpg')
+        self.assertEqual(
+            {(args[1], kwargs['format'])
+             for args, kwargs in get.call_args_list},
+            {('960x339', thumbnails.FALLBACK_FORMAT)}
+        )
+        task = Task.objects.get()
+        self.assertEqual(task.name, thumbnails.GENERATE_TASK)
+        self.assertEqual(execute(claim_tasks(limit=1)[0]), Task.DONE)
+        self.assertIn('<picture>', self.render('posts/missing.jpg'))
+
+    def test_variants_are_cached(self):
+        image = 'posts/missing.jpg'
+        variants = thumbnails.generate_variants(image)
+        self.assertEqual(
+            cache.get(thumbnails.variants_key(image)), variants
+        )
+        with mock.patch.object(thumbnails, 'get_thumbnail') as get:
+            self.render(image)
+        get.assert_not_called()
+
+    # Сломанная картинка не пересоздаётся на каждом показе
+    def test_failed_variants_are_cached_briefly(self):
+        image = 'posts/broken.jpg'
+        with mock.patch.object(
+            thumbnails, 'get_thumbnail', side_effect=OSError
+        ) as get, mock.patch.object(thumbnails, 'logger'):
+            self.assertEqual(
+                thumbnails.generate_variants(image),
+                {format_: [] for format_ in thumbnails.formats()}
+            )
+            calls = get.call_count
+            html = self.render(image)
+        # Только попытка запасной миниатюры, затем — исходный файл.
+        self.assertEqual(get.call_count, calls + 1)
+        self.assertIn('src="/media/posts/broken.jpg"', html)
+        self.assertFalse(Task.objects.exists())
+
+    # Веб-процесс с отдельным кешем находит миниатюры, созданные воркером
+    def test_variants_from_another_process(self):
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        os.makedirs(os.path.join(media_root, 'posts'))
+        Image.new('RGB', (1200, 600)).save(
+            os.path.join(media_root, 'posts', 'real.jpg')
+        )
+        with self.settings(MEDIA_ROOT=media_root):
+            # Файлы миниатюр уже на месте: sorl только запишет их в своё
+            # хранилище ключей, не пересчитывая картинку.
+            for format_ in thumbnails.formats():
+                for width in settings.THUMBNAIL_SRCSET_WIDTHS:
+                    size = thumbnails.geometry(width)
+                    name = thumbnails.lookup_backend.thumbnail_name(
+                        'posts/real.jpg', size,
+                        crop='center', upscale=True, format=format_
+                    )
+                    path = os.path.join(media_root, name)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    Image.new(
+                        'RGB', tuple(map(int, size.split('x')))
+                    ).save(path, format_)
+            thumbnails.generate_variants('posts/real.jpg')
+            # У воркера свой LocMemCache: веб-процесс его не видит.
+            cache.clear()
+            with mock.patch.object(thumbnails, 'get_thumbnail') as get:
+                html = self.render('posts/real.jpg')
+        get.assert_not_called()
+        self.assertIn('<picture>', html)
+        self.assertIn('width="960" height="339"', html)
+        self.assertFalse(Task.objects.exists())
+
+    def test_no_image(self):
+        self.assertEqual(self.render(''), '')
+
+
+@override_settings(RATELIMITS={'add_comment': '2/m', 'follow': '1/m'})
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def comment(self, client=None):
+        return (client or self.client).post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'}
+        )
+
+    def test_rejects_over_limit_without_db(self):
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 302)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.comment()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Сессия читается из кеша, пользователь и пост не загружаются.
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_buckets_per_user_and_scope(self):
+        for _ in range(2):
+            self.comment()
+        self.assertEqual(self.comment().status_code, 429)
+        response = self.client.get(
+            reverse('posts:profile_follow', args=['user'])
+        )
+        self.assertNotEqual(response.status_code, 429)
+        other = User.objects.create_user(username='other')
+        self.client.force_login(other)
+        self.assertEqual(self.comment().status_code, 302)
+        # Анонимы делят ведро по IP.
+        self.client.logout()
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 429)
+
+    def test_get_is_not_limited(self):
+        for _ in range(3):
+            self.comment()
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_client_ip_behind_trusted_proxy(self):
+        factory = RequestFactory()
+        forwarded = {'HTTP_X_FORWARDED_FOR': '1.1.1.1, 2.2.2.2, 10.0.0.5'}
+        direct = factory.get('/', REMOTE_ADDR='3.3.3.3', **forwarded)
+        proxied = factory.get('/', REMOTE_ADDR='10.0.0.1', **forwarded)
+        real_ip = factory.get(
+            '/', REMOTE_ADDR='10.0.0.1', HTTP_X_REAL_IP='4.4.4.4'
+        )
+        # Без настройки заголовкам не верим.
+        self.assertEqual(ratelimit.client_ip(proxied), '10.0.0.1')
+        with self.settings(RATELIMIT_TRUSTED_PROXIES=['10.0.0.0/8']):
+            self.assertEqual(ratelimit.client_ip(direct), '3.3.3.3')
+            self.assertEqual(ratelimit.client_ip(proxied), '2.2.2.2')
+            self.assertEqual(ratelimit.client_ip(real_ip), '4.4.4.4')
+
+    def test_bucket_refills_over_window(self):
+        rate = '10/m'
+        for _ in range(10):
+            self.assertIsNone(ratelimit.consume('s', 'a', rate, now=60))
+        self.assertIsNotNone(ratelimit.consume('s', 'a', rate, now=119))
+        # К середине следующего окна вернулась половина токенов.
+        for _ in range(4):
+            self.assertIsNone(ratelimit.consume('s', 'a', rate, now=150))
+        self.assertIsNotNone(ratelimit.consume('s', 'a', rate, now=150))
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command('benchmark_ratelimit', '--requests', '50', stdout=out)
+        self.assertIn('мкс/запрос', out.getvalue())
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class QueuedMailTest(TestCase):
+    def tearDown(self):
+        queued_mail.close_delivery_connection()
+
+    def send(self):
+        message = mail.EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@yatube.test', ['to@yatube.test'],
+            headers={'X-Test': '1'},
+        )
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.attach('note.txt', 'Вложение', 'text/plain')
+        message.send()
+
+    def deliver(self):
+        return [execute(task_id) for task_id in claim_tasks(limit=10)]
+
+    def test_send_only_enqueues(self):
+        self.send()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(
+            Task.objects.get().name, queued_mail.SEND_TASK
+        )
+        self.assertEqual(self.deliver(), [Task.DONE])
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, 'Тема')
+        self.assertEqual(message.to, ['to@yatube.test'])
+        self.assertEqual(message.extra_headers, {'X-Test': '1'})
+        self.assertEqual(
+            message.alternatives, [('<p>Текст</p>', 'text/html')]
+        )
+        self.assertEqual(
+            message.attachments, [('note.txt', 'Вложение', 'text/plain')]
+        )
+
+    def test_connection_reused_between_messages(self):
+        self.send()
+        self.send()
+        with mock.patch.object(
+            queued_mail, 'get_connection', wraps=queued_mail.get_connection
+        ) as get_connection:
+            self.deliver()
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_delivery_is_retried_later(self):
+        self.send()
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('SMTP недоступен'),
+        ) as send_messages:
+            self.assertEqual(self.deliver(), [Task.PENDING])
+        # Сначала через старое соединение, потом через новое.
+        self.assertEqual(send_messages.call_count, 2)
+        task = Task.objects.get()
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.run_at, task.created)
+
+
+class PasswordHashingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader', password='secret'
+        )
+
+    def test_tests_use_fast_hasher(self):
+        self.assertTrue(self.user.password.startswith('md5$'))
+        # MD5 ставит только тестовый раннер, не настройки проекта.
+        self.assertNotIn(FAST_HASHER, project_settings.PASSWORD_HASHERS)
+
+    def login(self):
+        return self.client.login(username='reader', password='secret')
+
+    @override_settings(PASSWORD_HASHERS=[
+        'core.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ], PASSWORD_HASHING={'pbkdf2': {'iterations': 1000}})
+    def test_rehash_on_login(self):
+        # Старый алгоритм: пароль перехешируется основным хешером.
+        self.assertTrue(self.login())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+        # Выросла стоимость: хеш обновляется при следующем входе.
+        with override_settings(PASSWORD_HASHING={
+            'pbkdf2': {'iterations': 2000}
+        }):
+            self.assertTrue(self.login())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertFalse(self.client.login(username='reader', password='x'))
+
+    # Argon2id для новых хешей; хеши Argon2i проверяются и обновляются
+    @skipUnless(find_spec('argon2'), 'нужен argon2-cffi')
+    @override_settings(PASSWORD_HASHING={
+        'argon2': {'time_cost': 1, 'memory_cost': 1024, 'parallelism': 1}
+    })
+    def test_argon2id(self):
+        import argon2
+
+        hasher = hashers.Argon2PasswordHasher()
+        encoded = hasher.encode('secret', hasher.salt())
+        self.assertTrue(encoded.startswith('argon2$argon2id$'))
+        self.assertTrue(hasher.verify('secret', encoded))
+        self.assertFalse(hasher.must_update(encoded))
+        legacy = 'argon2' + argon2.low_level.hash_secret(
+            b'secret', b'somesaltvalue', time_cost=1, memory_cost=1024,
+            parallelism=1, hash_len=argon2.DEFAULT_HASH_LENGTH,
+            type=argon2.low_level.Type.I,
+        ).decode('ascii')
+        self.assertTrue(hasher.verify('secret', legacy))
+        self.assertTrue(hasher.must_update(legacy))
+
+    def test_benchmark_login(self):
+        out = StringIO()
+        call_command(
+            'benchmark_login', '--seconds', '0.01', '--workers', '1',
+            stdout=out
+        )
+        self.assertIn('md5', out.getvalue())
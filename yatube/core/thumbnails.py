@@ -0,0 +1,187 @@
+import logging
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from taskqueue.queue import enqueue
+
+logger = logging.getLogger(__name__)
+
+# Формат для <img>, его понимают все браузеры.
+FALLBACK_FORMAT = 'JPEG'
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+}
+VARIANTS_TIMEOUT = 60 * 60 * 24 * 30
+# Столько живут неполный набор вариантов (битая картинка, сбой sorl) и
+# отметка о поставленной генерации: повтор не чаще раза в этот срок.
+VARIANTS_RETRY_TIMEOUT = 60 * 10
+# Через столько веб-процесс снова ищет недостающие варианты в хранилище
+# sorl: воркер мог их уже создать.
+VARIANTS_PENDING_TIMEOUT = 60
+GENERATE_TASK = 'core.generate_variants'
+VARIANTS_VERSION_KEY = 'srcset:version'
+
+
+def formats():
+    return tuple(settings.THUMBNAIL_SRCSET_FORMATS) + (FALLBACK_FORMAT,)
+
+
+def geometry(width):
+    ratio_width, ratio_height = settings.THUMBNAIL_SRCSET_RATIO
+    return f'{width}x{round(width * ratio_height / ratio_width)}'
+
+
+def variants_version():
+    version = cache.get(VARIANTS_VERSION_KEY)
+    if version is None:
+        cache.add(VARIANTS_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VARIANTS_VERSION_KEY)
+    return version
+
+
+def invalidate_variants():
+    """Сбрасывает все наборы вариантов разом, сменив версию их ключей.
+
+    Нужно после удаления миниатюр: иначе страницы ссылались бы на
+    удалённые файлы, пока не истечёт VARIANTS_TIMEOUT.
+    """
+    cache.set(VARIANTS_VERSION_KEY, uuid4().hex, None)
+
+
+def variants_key(image):
+    # Карточки постов передают имя файла строкой, а не FieldFile.
+    name = getattr(image, 'name', image)
+    config = repr((
+        settings.THUMBNAIL_SRCSET_WIDTHS,
+        formats(),
+        settings.THUMBNAIL_SRCSET_RATIO,
+        variants_version(),
+    ))
+    digest = md5(f'{name}:{config}'.encode()).hexdigest()
+    return f'srcset:{digest}'
+
+
+class LookupBackend(ThumbnailBackend):
+    """Бэкенд sorl, который только ищет готовые миниатюры."""
+
+    def thumbnail_name(self, file_, geometry_string, **options):
+        """Имя файла миниатюры, как его строит get_thumbnail."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return self._get_thumbnail_filename(source, geometry_string, options)
+
+    def find_thumbnail(self, file_, geometry_string, **options):
+        """Готовая миниатюра из хранилища ключей sorl или None.
+
+        Картинка не открывается и ничего не создаётся. Хранилище ключей
+        sorl лежит в базе, поэтому его видят все процессы, в отличие
+        от LocMemCache.
+        """
+        name = self.thumbnail_name(file_, geometry_string, **options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+lookup_backend = LookupBackend()
+
+
+def created_thumbnail(image, geometry_string, **options):
+    try:
+        thumbnail = get_thumbnail(image, geometry_string, **options)
+    except Exception:
+        logger.exception(
+            'Не удалось создать миниатюру %s %s', image, options['format']
+        )
+        return None
+    return thumbnail if thumbnail.exists() else None
+
+
+def collect_variants(image, thumbnail):
+    """{формат: [(ширина, высота, url), ...]} и признак полного набора.
+
+    thumbnail(image, geometry, **options) возвращает миниатюру или None.
+    """
+    variants = {}
+    complete = True
+    for format_ in formats():
+        variants[format_] = []
+        for width in settings.THUMBNAIL_SRCSET_WIDTHS:
+            found = thumbnail(
+                image, geometry(width),
+                crop='center', upscale=True, format=format_
+            )
+            if found is None:
+                complete = False
+                continue
+            variants[format_].append((found.width, found.height, found.url))
+    return variants, complete
+
+
+def generate_variants(image):
+    """Создаёт миниатюры всех ширин и форматов для картинки.
+
+    Возвращает {формат: [(ширина, высота, url), ...]}. Полный набор
+    кешируется на VARIANTS_TIMEOUT, неполный — на VARIANTS_RETRY_TIMEOUT,
+    чтобы сломанная картинка не пересоздавалась на каждом показе.
+    """
+    variants, complete = collect_variants(image, created_thumbnail)
+    cache.set(
+        variants_key(image), variants,
+        VARIANTS_TIMEOUT if complete else VARIANTS_RETRY_TIMEOUT
+    )
+    return variants
+
+
+def responsive_variants(image):
+    """Готовые варианты картинки; пока их нет — найденные из них.
+
+    Запрос не создаёт миниатюры сам: при промахе он ищет уже созданные
+    в хранилище ключей sorl (его видят все процессы, даже с
+    LocMemCache), а генерацию недостающих ставит в очередь задач не
+    чаще раза в VARIANTS_RETRY_TIMEOUT.
+    """
+    key = variants_key(image)
+    variants = cache.get(key)
+    if variants is None:
+        variants, complete = collect_variants(
+            image, lookup_backend.find_thumbnail
+        )
+        if complete:
+            cache.set(key, variants, VARIANTS_TIMEOUT)
+            return variants
+        cache.set(key, variants, VARIANTS_PENDING_TIMEOUT)
+        if cache.add(f'{key}:queued', True, VARIANTS_RETRY_TIMEOUT):
+            enqueue(
+                GENERATE_TASK, {'name': getattr(image, 'name', image)},
+                key=key
+            )
+    return variants
+
+
+def fallback_thumbnail(image):
+    """Одна JPEG-миниатюра самой большой ширины, пока нет srcset.
+
+    Создаётся в запросе, как раньше создавалась миниатюра карточки,
+    поэтому страница не отдаёт вместо неё исходный файл. None, если
+    картинку не удалось обработать.
+    """
+    return created_thumbnail(
+        image, geometry(max(settings.THUMBNAIL_SRCSET_WIDTHS)),
+        crop='center', upscale=True, format=FALLBACK_FORMAT
+    )
@@ -1,4 +1,15 @@
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+
+from . import metrics as process_metrics
+from .files import IMMUTABLE, offload_file, serve_file
 
 
 def page_not_found(request, exception):
@@ -7,3 +18,56 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    if not (request.user.is_staff
+            or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS):
+        raise Http404
+    return HttpResponse(
+        process_metrics.render(), content_type='text/plain; version=0.0.4'
+    )
+
+
+def serve_static(request, path):
+    """Отдаёт собранную статику, когда перед приложением нет фронт-сервера.
+
+    Файлы с хешем в имени кешируются навсегда, остальные проверяются
+    по ETag.
+    """
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    if hasattr(staticfiles_storage, 'is_hashed') and (
+        staticfiles_storage.is_hashed(path)
+    ):
+        cache_control = IMMUTABLE
+    else:
+        cache_control = f'public, max-age={settings.STATIC_MAX_AGE}'
+    return serve_file(request, fullpath, cache_control, compressed=True)
+
+
+def serve_media(request, path):
+    """Отдаёт загруженные картинки и миниатюры из MEDIA_ROOT.
+
+    Имена файлов в posts/ и cache/ не переиспользуются, поэтому
+    они кешируются навсегда. Каталог проверяется по нормализованному
+    имени: иначе posts/../private/ прошёл бы проверку префикса.
+    """
+    if '..' in path.split('/'):
+        raise Http404
+    name = posixpath.normpath(path)
+    if not name.startswith(settings.MEDIA_SERVE_DIRS):
+        raise Http404
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    if settings.MEDIA_ACCEL:
+        return offload_file(name, fullpath, IMMUTABLE)
+    return serve_file(request, fullpath, IMMUTABLE)
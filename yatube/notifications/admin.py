@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipient',
+        'verb',
+        'actor',
+        'post',
+        'created',
+        'sent',
+    )
+    list_filter = ('verb', 'created')
+    list_select_related = ('recipient', 'actor', 'post')
+    raw_id_fields = ('recipient', 'actor', 'post')
+    empty_value_display = '-пусто-'
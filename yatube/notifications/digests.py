@@ -0,0 +1,117 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Max
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from posts.links import post_url
+
+from .models import Notification
+
+DIGEST_FIELDS = (
+    'id',
+    'recipient_id',
+    'recipient__email',
+    'recipient__username',
+    'verb',
+    'actor__username',
+    'post_id',
+    'post__text',
+)
+
+
+class Event:
+    __slots__ = ('verb', 'actor', 'url', 'text')
+
+    def __init__(self, row):
+        _, _, _, _, self.verb, self.actor, post_id, text = row
+        self.url = settings.SITE_URL + post_url(post_id)
+        self.text = Truncator(text).words(10)
+
+
+def digest_message(username, email, events):
+    config = settings.NOTIFICATIONS
+    shown = events[:config['events_per_email']]
+    context = {
+        'username': username,
+        'comments': [e for e in shown if e.verb == Notification.COMMENT],
+        'posts': [e for e in shown if e.verb == Notification.POST],
+        'more': len(events) - len(shown),
+        'site_url': settings.SITE_URL,
+    }
+    return EmailMessage(
+        subject=f'Yatube: новых событий — {len(events)}',
+        body=render_to_string('notifications/digest.txt', context),
+        to=[email],
+    )
+
+
+class DigestSender:
+    """Рассылает накопленные уведомления: одно письмо на получателя.
+
+    Уведомления читаются потоком по (получатель, id), письма уходят
+    пачками по batch через одно открытое соединение
+    EMAIL_DELIVERY_BACKEND (команда и так работает в фоне, очередь
+    писем ей не нужна), и после каждой отправленной пачки её
+    уведомления помечаются отправленными. Если сервер упадёт посреди рассылки,
+    следующий запуск продолжит с неотправленной пачки.
+    """
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.sent = 0
+
+    def pending(self, last_id):
+        return Notification.objects.filter(
+            sent__isnull=True, pk__lte=last_id
+        ).order_by('recipient_id', 'id').values_list(
+            *DIGEST_FIELDS
+        ).iterator(chunk_size=settings.NOTIFICATIONS['chunk'])
+
+    def run(self):
+        """Отправляет дайджесты. Возвращает число писем."""
+        # Уведомления, записанные во время рассылки, ждут следующего запуска.
+        last_id = Notification.objects.filter(
+            sent__isnull=True
+        ).aggregate(last=Max('id'))['last']
+        if last_id is None:
+            return 0
+        messages = []
+        recipients = []
+        with get_connection(settings.EMAIL_DELIVERY_BACKEND) as connection:
+            for recipient_id, rows in groupby(
+                self.pending(last_id), key=lambda row: row[1]
+            ):
+                rows = list(rows)
+                _, _, email, username, *_ = rows[0]
+                recipients.append(recipient_id)
+                if email:
+                    messages.append(digest_message(
+                        username, email, [Event(row) for row in rows]
+                    ))
+                if len(recipients) >= self.batch:
+                    self.flush(connection, messages, recipients, last_id)
+            self.flush(connection, messages, recipients, last_id)
+        return self.sent
+
+    def flush(self, connection, messages, recipients, last_id):
+        if messages:
+            self.sent += connection.send_messages(messages) or 0
+        # Получатели без адреса тоже помечаются, чтобы не копить события.
+        Notification.objects.filter(
+            recipient_id__in=recipients, sent__isnull=True, pk__lte=last_id
+        ).update(sent=timezone.now())
+        messages.clear()
+        recipients.clear()
+
+
+def purge_sent(days):
+    """Удаляет отправленные уведомления старше days дней."""
+    deleted, _ = Notification.objects.filter(
+        sent__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.digests import DigestSender, purge_sent
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет накопленные уведомления письмами-дайджестами, '
+        'по одному на получателя'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=settings.NOTIFICATIONS['batch'],
+            help='Писем за одну отправку через открытое соединение'
+        )
+
+    def handle(self, *args, **options):
+        sent = DigestSender(options['batch']).run()
+        purged = purge_sent(settings.NOTIFICATIONS['keep_days'])
+        self.stdout.write(
+            f'Отправлено писем: {sent}, удалено старых уведомлений: {purged}'
+        )
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Q
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class Notification(models.Model):
+    """Событие для письма-дайджеста получателю.
+
+    Строки пишут обработчики очереди задач, а отправляет и помечает
+    команда send_digests.
+    """
+    COMMENT = 'comment'
+    POST = 'post'
+    VERB_CHOICES = (
+        (COMMENT, 'Комментарий к посту'),
+        (POST, 'Новый пост автора из подписок'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор события'
+    )
+    verb = models.CharField(
+        max_length=10, choices=VERB_CHOICES, verbose_name='Событие'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Только неотправленные: индекс не растёт вместе с историей.
+            models.Index(
+                fields=['recipient', 'id'],
+                name='notification_pending_idx',
+                condition=Q(sent__isnull=True)
+            ),
+        ]
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+    def __str__(self):
+        return f'{self.get_verb_display()} для {self.recipient_id}'
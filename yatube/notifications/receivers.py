@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.dispatch import receiver
+
+from posts import signals
+from posts.models import Follow
+
+from .models import Notification
+
+
+def record(notifications):
+    Notification.objects.bulk_create(
+        notifications, batch_size=settings.NOTIFICATIONS['batch']
+    )
+
+
+def followers_of(author_ids):
+    followers = {}
+    for user_id, author_id in Follow.objects.filter(
+        author_id__in=author_ids
+    ).values_list('user_id', 'author_id').iterator():
+        followers.setdefault(author_id, []).append(user_id)
+    return followers
+
+
+def record_posts(posts):
+    followers = followers_of({post.author_id for post in posts})
+    record(
+        Notification(
+            recipient_id=user_id, actor_id=post.author_id,
+            verb=Notification.POST, post_id=post.pk
+        )
+        for post in posts
+        for user_id in followers.get(post.author_id, ())
+    )
+
+
+def record_comments(comments):
+    record(
+        Notification(
+            recipient_id=comment.post.author_id, actor_id=comment.author_id,
+            verb=Notification.COMMENT, post_id=comment.post_id
+        )
+        for comment in comments
+        if comment.author_id != comment.post.author_id
+    )
+
+
+@receiver(signals.post_changed)
+def post_created(sender, post, created, **kwargs):
+    if created:
+        record_posts([post])
+
+
+@receiver(signals.posts_created)
+def posts_created(sender, posts, **kwargs):
+    record_posts(posts)
+
+
+@receiver(signals.comment_added)
+def comment_added(sender, comment, **kwargs):
+    record_comments([comment])
+
+
+@receiver(signals.comments_added)
+def comments_added(sender, comments, **kwargs):
+    record_comments(comments)
@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import signals
+from posts.models import Comment, Follow, Post
+
+from .digests import DigestSender, purge_sent
+from .models import Notification
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class NotificationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@yatube.test'
+        )
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@yatube.test'
+            )
+            for i in range(3)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+        cls.post = Post.objects.create(author=cls.author, text='Пост автора')
+
+    def comment(self, author, text='Комментарий'):
+        comment = Comment.objects.create(
+            post=self.post, author=author, text=text
+        )
+        signals.comment_added.send(sender=Comment, comment=comment)
+
+    def publish(self, text='Новый пост'):
+        post = Post.objects.create(author=self.author, text=text)
+        signals.post_changed.send(sender=Post, post=post, created=True)
+        return post
+
+    def test_comment_notifies_post_author(self):
+        self.comment(self.readers[0])
+        self.comment(self.author)
+        self.assertEqual(
+            list(Notification.objects.values_list(
+                'recipient', 'actor', 'verb'
+            )),
+            [(self.author.pk, self.readers[0].pk, Notification.COMMENT)]
+        )
+
+    def test_new_post_notifies_followers(self):
+        post = self.publish()
+        self.assertEqual(
+            set(Notification.objects.filter(
+                post=post, verb=Notification.POST
+            ).values_list('recipient', flat=True)),
+            {reader.pk for reader in self.readers}
+        )
+
+    def test_one_digest_per_recipient_in_batches(self):
+        self.comment(self.readers[0], 'Первый')
+        self.comment(self.readers[1], 'Второй')
+        self.publish()
+        with mock.patch.object(
+            EmailBackend, 'send_messages', autospec=True,
+            side_effect=EmailBackend.send_messages
+        ) as send:
+            self.assertEqual(DigestSender(batch=2).run(), 4)
+        self.assertEqual(send.call_count, 2)
+        # Все пачки ушли через одно соединение.
+        self.assertEqual(len({call[0][0] for call in send.call_args_list}), 1)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['author@yatube.test'] + [
+                f'reader{i}@yatube.test' for i in range(3)
+            ]
+        )
+        digest = next(
+            message for message in mail.outbox
+            if message.to == ['author@yatube.test']
+        )
+        self.assertIn('reader0 к «Пост автора»', digest.body)
+        self.assertIn('reader1', digest.body)
+        self.assertIn(self.post.get_absolute_url(), digest.body)
+        self.assertFalse(
+            Notification.objects.filter(sent__isnull=True).exists()
+        )
+        self.assertEqual(DigestSender(batch=2).run(), 0)
+
+    def test_recipient_without_email_is_skipped(self):
+        self.author.email = ''
+        self.author.save()
+        self.comment(self.readers[0])
+        out = StringIO()
+        call_command('send_digests', stdout=out)
+        self.assertIn('Отправлено писем: 0', out.getvalue())
+        self.assertFalse(
+            Notification.objects.filter(sent__isnull=True).exists()
+        )
+
+    def test_purge_sent(self):
+        self.comment(self.readers[0])
+        self.comment(self.readers[1])
+        Notification.objects.filter(actor=self.readers[0]).update(
+            sent=timezone.now() - timedelta(days=40)
+        )
+        self.assertEqual(purge_sent(30), 1)
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,93 @@
+from django.db import transaction
+
+from .forms import CommentForm, PostForm
+from .models import Comment, Post
+from .utils import notify_comments_added, notify_posts_created
+
+
+class BatchError(Exception):
+    """Пачка не прошла проверку; errors — ошибки по номерам элементов."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def error(message):
+    return {'message': message, 'code': 'invalid'}
+
+
+def validate(form_class, items, errors=None):
+    """Проверяет элементы формой сайта и возвращает несохранённые объекты.
+
+    Пачка принимается целиком или никак: при любой ошибке ничего не
+    пишется, а в BatchError попадают ошибки всех элементов вместе с
+    уже найденными errors.
+    """
+    objects = []
+    errors = dict(errors or {})
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {'__all__': [error('Ожидается объект')]}
+            continue
+        form = form_class(data=item)
+        if form.is_valid():
+            objects.append(form.save(commit=False))
+        else:
+            errors.setdefault(index, {}).update(form.errors.get_json_data())
+    if errors:
+        raise BatchError(errors)
+    return objects
+
+
+def insert(model, objects, author):
+    """bulk_create одним запросом на пачку, с id у созданных объектов.
+
+    Бэкенды, которые не возвращают id из пакетной вставки (SQLite),
+    получают их отдельным запросом: пишущие транзакции там идут по
+    одной, так что последние id автора — это и есть вставленные строки.
+    """
+    with transaction.atomic():
+        model.objects.bulk_create(objects)
+        if objects and objects[0].pk is None:
+            ids = model.objects.filter(author=author).order_by(
+                '-pk'
+            ).values_list('pk', flat=True)[:len(objects)]
+            for obj, pk in zip(objects, reversed(ids)):
+                obj.pk = pk
+    return objects
+
+
+def create_posts(author, items):
+    posts = validate(PostForm, items)
+    for post in posts:
+        post.author = author
+    insert(Post, posts, author)
+    # Очередь разошлёт одно событие на всю пачку после коммита.
+    if posts:
+        notify_posts_created(posts)
+    return posts
+
+
+def add_comments(author, items):
+    # Посты всей пачки проверяются одним запросом.
+    post_ids = [
+        item.get('post') if isinstance(item, dict) else None
+        for item in items
+    ]
+    existing = set(Post.objects.filter(
+        pk__in=[pk for pk in post_ids if type(pk) is int]
+    ).values_list('pk', flat=True))
+    missing = {
+        index: {'post': [error('Пост не найден')]}
+        for index, pk in enumerate(post_ids)
+        if pk not in existing
+    }
+    comments = validate(CommentForm, items, missing)
+    for comment, pk in zip(comments, post_ids):
+        comment.author = author
+        comment.post_id = pk
+    insert(Comment, comments, author)
+    if comments:
+        notify_comments_added(comments)
+    return comments
@@ -0,0 +1,131 @@
+import base64
+import json
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+
+from . import versions
+from .read_models import card_rows, post_cards
+
+FRAGMENT_KEY = 'fragment:{}:{}:{}'
+# Тот же порядок, что у Post.Meta.ordering: полные страницы и фрагменты
+# должны идти по одному ключу, иначе на границе страницы посты с
+# одинаковым pub_date повторяются или теряются.
+FEED_ORDER = ('-pub_date', '-pk')
+
+
+def make_cursor(moment, pk):
+    """Непрозрачный курсор на позицию после (moment, pk) в ленте."""
+    raw = json.dumps([moment.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(moment, pk) из курсора; ValueError, если курсор испорчен."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        moment = parse_datetime(value)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f'Неверный курсор {cursor!r}') from error
+    if moment is None or not isinstance(pk, int):
+        raise ValueError(f'Неверный курсор {cursor!r}')
+    return moment, pk
+
+
+def after_position(field, moment, pk):
+    """Условие «после (moment, pk)» для ленты по убыванию (field, pk)."""
+    return Q(**{f'{field}__lt': moment}) | Q(**{field: moment, 'pk__lt': pk})
+
+
+def after_cursor(field, cursor):
+    """Условие «после курсора» для ленты по убыванию (field, pk)."""
+    return after_position(field, *decode_cursor(cursor))
+
+
+def encode_cursor(card):
+    """Курсор на позицию сразу после карточки в ленте."""
+    return make_cursor(card.pub_date, card.pk)
+
+
+def next_batch(posts, position, size):
+    """Следующие size карточек ленты после position и курсор за ними.
+
+    Выборка идёт по ключу (pub_date, id), а не через OFFSET, поэтому
+    дальние страницы стоят столько же, сколько первая, и не нужен
+    COUNT(*) для пагинатора.
+    """
+    posts = posts.order_by(*FEED_ORDER)
+    if position:
+        posts = posts.filter(after_position('pub_date', *position))
+    rows = list(card_rows(posts)[:size + 1])
+    cards = post_cards(rows[:size])
+    next_cursor = encode_cursor(cards[-1]) if len(rows) > size else None
+    return cards, next_cursor
+
+
+def next_url(path, page_obj):
+    """Адрес фрагмента, продолжающего страницу ленты, или None."""
+    if not page_obj.has_next():
+        return None
+    return f'{path}?cursor={encode_cursor(page_obj.object_list[-1])}'
+
+
+def versions_digest(scopes):
+    return md5(':'.join(versions.current(*scopes)).encode()).hexdigest()
+
+
+def fragment_response(request, posts, key, scopes, private=False,
+                      context=None):
+    """Только карточки следующей порции ленты, без base.html.
+
+    Порция по курсору кешируется по ключу ленты, курсору и версиям
+    областей scopes (posts.versions), так что новый или изменённый
+    пост сразу сбрасывает кеш. Следующий курсор уходит в заголовках
+    X-Next-Cursor и Link.
+    """
+    cursor = request.GET.get('cursor', '')
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            return HttpResponseBadRequest('Неверный курсор')
+    # В ключ идёт разобранная позиция, а не строка из запроса: мусорные
+    # курсоры не доходят до кеша, а разные записи одной позиции делят
+    # одну запись.
+    timeout = settings.FEED_FRAGMENT_TIMEOUT
+    cache_key = FRAGMENT_KEY.format(
+        key,
+        versions_digest(scopes),
+        make_cursor(*position) if position else ''
+    )
+    cached = cache.get(cache_key)
+    if cached is None:
+        cards, next_cursor = next_batch(
+            posts, position, settings.POSTS_PER_PAGE
+        )
+        html = render_to_string(
+            'posts/includes/post_cards.html',
+            {'posts': cards, **(context or {})}
+        )
+        cached = (html, next_cursor)
+        cache.set(cache_key, cached, timeout)
+    html, next_cursor = cached
+    response = HttpResponse(html)
+    if next_cursor:
+        response['X-Next-Cursor'] = next_cursor
+        response['Link'] = (
+            f'<{request.path}?cursor={next_cursor}>; rel="next"'
+        )
+    if private:
+        patch_cache_control(response, private=True, max_age=timeout)
+    else:
+        patch_cache_control(response, public=True, max_age=timeout)
+    return response
@@ -0,0 +1,66 @@
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import reverse
+
+URL_CACHE_SIZE = 4096
+
+ROUTE_PARAM = re.compile(r'<(?:\w+:)?(\w+)>')
+# Те же безопасные символы, что использует django.urls.reverse.
+SAFE_CHARS = "!$&'()*+,;=/~:@"
+
+
+@lru_cache(maxsize=None)
+def url_table():
+    """Таблица шаблонов адресов posts.urls, собирается один раз."""
+    from . import urls
+
+    routes = {
+        pattern.name: str(pattern.pattern) for pattern in urls.urlpatterns
+    }
+    index = reverse(f'{urls.app_name}:index')
+    prefix = index[:len(index) - len(routes['index'])]
+    return {
+        name: prefix + ROUTE_PARAM.sub(r'{\1}', route)
+        for name, route in routes.items()
+    }
+
+
+def build_url(name, **kwargs):
+    return url_table()[name].format(**{
+        key: quote(str(value), safe=SAFE_CHARS)
+        for key, value in kwargs.items()
+    })
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def profile_url(username):
+    return build_url('profile', username=username)
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def group_url(slug):
+    return build_url('group_list', slug=slug)
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def post_url(post_id):
+    return build_url('post_detail', post_id=post_id)
+
+
+def user_url(user):
+    return profile_url(user.username)
+
+
+def clear_url_caches():
+    for builder in (url_table, profile_url, group_url, post_url):
+        builder.cache_clear()
+
+
+@receiver(setting_changed)
+def root_urlconf_changed(*, setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        clear_url_caches()
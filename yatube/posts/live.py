@@ -0,0 +1,108 @@
+import json
+import time
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+
+from core import metrics
+from core.events import get_broker
+
+from . import signals
+
+ALL_POSTS = 'posts'
+
+
+def group_channel(group_id):
+    return f'group:{group_id}'
+
+
+def author_channel(author_id):
+    return f'author:{author_id}'
+
+
+@receiver(signals.post_changed)
+def publish_new_post(sender, post, created, **kwargs):
+    if created:
+        publish(post)
+
+
+@receiver(signals.posts_created)
+def publish_new_posts(sender, posts, **kwargs):
+    for post in posts:
+        publish(post)
+
+
+def publish(post):
+    data = {
+        'id': post.pk,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+    }
+    broker = get_broker()
+    channels = [ALL_POSTS, author_channel(post.author_id)]
+    if post.group_id:
+        channels.append(group_channel(post.group_id))
+    for channel in channels:
+        broker.publish(channel, data)
+
+
+def format_event(event_id, data):
+    return f'id: {event_id}\nevent: post\ndata: {json.dumps(data)}\n\n'
+
+
+def event_stream(subscription):
+    """Поток SSE с событиями о новых постах.
+
+    Пинг раз в heartbeat секунд не даёт прокси закрыть молчащее
+    соединение. Через max_age секунд поток закрывается, и браузер
+    переподключается с Last-Event-ID, ничего не теряя: так соединения
+    не живут вечно.
+    """
+    config = settings.LIVE_EVENTS
+    deadline = time.monotonic() + config['max_age']
+    try:
+        yield f'retry: {config["retry"] * 1000}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            events = subscription.wait(
+                max(0, min(config['heartbeat'], remaining))
+            )
+            if not events:
+                yield ': ping\n\n'
+            for event_id, _, data in events:
+                yield format_event(event_id, data)
+            if remaining <= 0:
+                return
+    finally:
+        subscription.close()
+
+
+def enabled():
+    return settings.LIVE_EVENTS['enabled']
+
+
+def events_url(viewname, *args):
+    """Адрес потока для баннера ленты или None, если потоки выключены."""
+    return reverse(viewname, args=args) if enabled() else None
+
+
+def stream_response(request, channels):
+    if not enabled():
+        raise Http404('Потоки событий выключены')
+    try:
+        last_id = int(request.META['HTTP_LAST_EVENT_ID'])
+    except (KeyError, ValueError):
+        last_id = None
+    if last_id is not None and last_id < 0:
+        last_id = None
+    subscription = get_broker().subscribe(channels, last_id)
+    metrics.increment('live_streams_total')
+    response = StreamingHttpResponse(
+        event_stream(subscription), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Не даём nginx буферизовать поток.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.http import Http404
+
+from core.cache import TwoTierCache
+
+from .models import Group, User
+
+groups = TwoTierCache('group', **settings.LOOKUP_CACHE)
+users = TwoTierCache('user', **settings.LOOKUP_CACHE)
+
+# Модель -> (кеш, поле, по которому ищем объект).
+LOOKUPS = {
+    Group: (groups, 'slug'),
+    User: (users, 'username'),
+}
+
+# Кешируются только колонки, нужные страницам, неизменяемым кортежем: в
+# общий кеш не попадают хеш пароля, почта и права, а запросы не делят
+# между собой один экземпляр модели.
+GROUP_FIELDS = ('id', 'slug', 'title', 'description')
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+def lookup(lookup_cache, model, fields, **filters):
+    """Свой экземпляр model на каждый вызов из закешированной строки.
+
+    Остальные поля экземпляра отложены: обращение к ним догрузит строку
+    из базы, а save() запишет только загруженные поля.
+    """
+    key, = filters.values()
+    # from_db ждёт значения в порядке полей модели.
+    fields = [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in fields
+    ]
+    row = lookup_cache.get_or_load(
+        key,
+        lambda: model.objects.filter(**filters).values_list(*fields).first()
+    )
+    if row is None:
+        return None
+    return model.from_db(model.objects.db, fields, row)
+
+
+def get_group_or_404(slug):
+    group = lookup(groups, Group, GROUP_FIELDS, slug=slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def get_user_or_404(username):
+    user = lookup(users, User, USER_FIELDS, username=username)
+    if user is None:
+        raise Http404('Пользователь не найден')
+    return user
+
+
+def invalidate_on_commit(lookup_cache, key):
+    """Сбрасывает запись после фиксации транзакции.
+
+    Сброс до фиксации не помогает: параллельный запрос успел бы
+    прочитать ещё старую строку и снова положить её в кеш.
+    """
+    transaction.on_commit(lambda: lookup_cache.invalidate(key))
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=User)
+def invalidate_renamed(sender, instance, update_fields=None, **kwargs):
+    """Сбрасывает запись под старым ключом, если slug/username меняется."""
+    lookup_cache, field = LOOKUPS[sender]
+    if instance.pk is None:
+        return
+    if update_fields is not None and field not in update_fields:
+        return
+    old_key = sender.objects.filter(pk=instance.pk).values_list(
+        field, flat=True
+    ).first()
+    if old_key is not None and old_key != getattr(instance, field):
+        invalidate_on_commit(lookup_cache, old_key)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def invalidate_lookup(sender, instance, **kwargs):
+    lookup_cache, field = LOOKUPS[sender]
+    invalidate_on_commit(lookup_cache, getattr(instance, field))
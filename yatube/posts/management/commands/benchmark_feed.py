@@ -0,0 +1,84 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Group, Post, User
+from posts.read_models import card_rows, post_cards
+
+
+def orm_page(posts):
+    return list(posts.select_related('author', 'group'))
+
+
+def cards_page(posts):
+    return post_cards(card_rows(posts))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает память и время построения страницы ленты '
+        'из экземпляров моделей и из карточек PostCard'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 100, 1000]
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        # Недостающие посты создаются во временной транзакции
+        # и откатываются после замеров.
+        with transaction.atomic():
+            self.fill(max(sizes))
+            for size in sizes:
+                posts = Post.objects.all()[:size]
+                for name, build in (('orm', orm_page), ('cards', cards_page)):
+                    seconds, peak = self.measure(
+                        build, posts, options['repeat']
+                    )
+                    self.stdout.write(
+                        f'{size:>5} строк  {name:<5} '
+                        f'{seconds * 1000:8.2f} мс  {peak / 1024:8.1f} КиБ'
+                    )
+            transaction.set_rollback(True)
+
+    def fill(self, size):
+        missing = size - Post.objects.count()
+        if missing <= 0:
+            return
+        authors = [
+            User.objects.create(
+                username=f'benchmark-{i}',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            for i in range(10)
+        ]
+        group = Group.objects.create(
+            title='Бенчмарк', slug='benchmark', description='Бенчмарк'
+        )
+        Post.objects.bulk_create(
+            Post(
+                text=f'Пост для замера {i}',
+                author=authors[i % len(authors)],
+                group=group if i % 2 else None,
+            )
+            for i in range(missing)
+        )
+
+    def measure(self, build, posts, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            build(posts.all())
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        build(posts.all())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best, peak
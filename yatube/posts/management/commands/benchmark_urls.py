@@ -0,0 +1,56 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from posts.links import (
+    build_url, clear_url_caches, group_url, post_url, profile_url
+)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает django.urls.reverse с кешированными ссылками постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=10000)
+        parser.add_argument('--distinct', type=int, default=100)
+
+    def handle(self, *args, **options):
+        cards = options['cards']
+        distinct = options['distinct']
+        # Каждая карточка поста строит три ссылки: автор, группа, пост.
+        keys = [
+            (f'user{i % distinct}', f'group-{i % distinct}', i % distinct + 1)
+            for i in range(cards)
+        ]
+
+        def with_reverse():
+            for username, slug, post_id in keys:
+                reverse('posts:profile', args=[username])
+                reverse('posts:group_list', args=[slug])
+                reverse('posts:post_detail', args=[post_id])
+
+        def with_table():
+            for username, slug, post_id in keys:
+                build_url('profile', username=username)
+                build_url('group_list', slug=slug)
+                build_url('post_detail', post_id=post_id)
+
+        def with_builders():
+            for username, slug, post_id in keys:
+                profile_url(username)
+                group_url(slug)
+                post_url(post_id)
+
+        clear_url_caches()
+        reverse_time = min(timeit.repeat(with_reverse, number=1, repeat=3))
+        table_time = min(timeit.repeat(with_table, number=1, repeat=3))
+        builders_time = min(timeit.repeat(with_builders, number=1, repeat=3))
+        self.stdout.write(
+            f'{cards} карточек, {distinct} уникальных ссылок каждого вида\n'
+            f'reverse:   {reverse_time * 1000:.1f} мс\n'
+            f'таблица:   {table_time * 1000:.1f} мс\n'
+            f'кеш:       {builders_time * 1000:.1f} мс\n'
+            f'ускорение: {reverse_time / table_time:.1f}x без кеша, '
+            f'{reverse_time / builders_time:.1f}x с кешем'
+        )
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build
+
+
+class Command(BaseCommand):
+    help = (
+        'Дописывает в карту сайта новые посты, группы и профили '
+        'или пересобирает её целиком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересобрать с нуля, убрав удалённые страницы'
+        )
+
+    def handle(self, *args, **options):
+        count = build(full=options['full'])
+        self.stdout.write(
+            f'Записано адресов: {count} в {settings.SITEMAP_ROOT}'
+        )
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.media_gc import MediaCollector
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки удалённых постов и лишние миниатюры, '
+        'ограничивает размер кеша миниатюр'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-bytes', type=int,
+            default=settings.THUMBNAIL_CACHE_MAX_BYTES,
+            help='Предел размера кеша миниатюр, 0 — без предела'
+        )
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE,
+            help='Не трогать файлы моложе стольких секунд'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не удаляя'
+        )
+
+    def handle(self, *args, **options):
+        collector = MediaCollector(
+            max_bytes=options['max_bytes'] or None,
+            grace=options['grace'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+        count, reclaimed = collector.run()
+        verb = 'Можно удалить' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            f'{verb} файлов: {count}, освобождено байт: {reclaimed}'
+        )
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.prerender import all_targets, prerender
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет страницы about и первые страницы лент '
+        'в статические HTML-файлы в PRERENDER_ROOT'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.PRERENDER_PAGES,
+            help='Сколько первых страниц каждой ленты сохранять'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        files = prerender(all_targets(options['pages']), options['workers'])
+        self.stdout.write(
+            f'Сохранено страниц: {len(files)} в {settings.PRERENDER_ROOT}'
+        )
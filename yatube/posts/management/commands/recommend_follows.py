@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import recommend
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «на кого подписаться» по авторам, '
+        'на которых подписаны авторы из подписок пользователя'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=settings.FOLLOW_SUGGESTIONS['top'],
+            help='Сколько рекомендаций хранить для пользователя'
+        )
+        parser.add_argument(
+            '--chunk', type=int,
+            default=settings.FOLLOW_SUGGESTIONS['chunk'],
+            help='Сколько пользователей обрабатывать за транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        total = recommend(options['top'], options['chunk'])
+        self.stdout.write(f'Сохранено рекомендаций: {total}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.popularity import recompute_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает оценки популярности всех постов: учитывает '
+        'просмотры и подписчиков, которые не обновляют оценку сразу'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Пересчитано постов: {recompute_all()}')
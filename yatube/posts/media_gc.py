@@ -0,0 +1,147 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.thumbnails import invalidate_variants
+
+from .models import Post
+
+POSTS_DIR = Post._meta.get_field('image').upload_to.rstrip('/')
+THUMBNAILS_DIR = thumbnail_settings.THUMBNAIL_PREFIX.rstrip('/')
+
+
+def walk(root):
+    """Потоково обходит каталог, отдавая (имя в хранилище, os.stat)."""
+    top = default_storage.path(root)
+    stack = [top]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    relative = os.path.relpath(entry.path, top)
+                    name = '/'.join([root, *relative.split(os.sep)])
+                    yield name, entry.stat(follow_symlinks=False)
+
+
+def live_images():
+    return set(
+        Post.objects.exclude(image='')
+        .values_list('image', flat=True).iterator()
+    )
+
+
+class MediaCollector:
+    """Находит и удаляет лишние файлы в MEDIA_ROOT.
+
+    Сиротами считаются картинки в posts/, на которые не ссылается ни один
+    пост, и файлы в кеше миниатюр, которых нет в хранилище ключей sorl.
+    Миниатюры картинок-сирот sorl удаляет вместе с их записями. Файлы
+    моложе grace секунд не трогаются: их может прямо сейчас сохранять
+    другой процесс. Если кеш миниатюр больше max_bytes, самые давно
+    использованные миниатюры вытесняются.
+
+    С хранилищем ключей команда работает только через публичные методы
+    sorl (get, delete, cleanup). Поэтому пробный прогон не видит
+    миниатюр картинок-сирот: их находит только сам sorl при удалении.
+    """
+
+    def __init__(self, max_bytes=None, grace=None, workers=4, dry_run=False):
+        self.max_bytes = max_bytes
+        self.grace = settings.MEDIA_GC_GRACE if grace is None else grace
+        self.workers = workers
+        self.dry_run = dry_run
+        self.kvstore = default.kvstore
+
+    def is_fresh(self, stat, now):
+        return now - stat.st_mtime < self.grace
+
+    def orphan_sources(self, live, now):
+        return [
+            (name, stat.st_size) for name, stat in walk(POSTS_DIR)
+            if name not in live and not self.is_fresh(stat, now)
+        ]
+
+    def forget_sources(self, names):
+        """Удаляет записи sorl о картинках и их миниатюры."""
+        for name in names:
+            self.kvstore.delete(ImageFile(name, default_storage))
+        # Заодно записи о картинках, удалённых мимо этой команды.
+        self.kvstore.cleanup()
+
+    def sort_thumbnails(self, thumbnails, now):
+        """Делит миниатюры на удалённые sorl, известные ему и сирот."""
+        gone = []
+        cached = []
+        orphans = []
+        for name, stat in thumbnails:
+            if not self.dry_run and not default_storage.exists(name):
+                gone.append((name, stat.st_size))
+            elif self.kvstore.get(ImageFile(name, default_storage)):
+                last_used = max(stat.st_atime, stat.st_mtime)
+                cached.append((last_used, name, stat.st_size))
+            elif not self.is_fresh(stat, now):
+                orphans.append((name, stat.st_size))
+        return gone, cached, orphans
+
+    def evict(self, cached):
+        """Самые давно использованные миниатюры сверх max_bytes."""
+        if self.max_bytes is None:
+            return []
+        total = sum(size for _, _, size in cached)
+        evicted = []
+        for _, name, size in sorted(cached):
+            if total <= self.max_bytes:
+                break
+            total -= size
+            evicted.append((name, size))
+        return evicted
+
+    def delete(self, files):
+        """Удаляет файлы и возвращает те, что действительно удалены."""
+        if self.dry_run:
+            return files
+
+        def delete_one(file):
+            try:
+                os.remove(default_storage.path(file[0]))
+            except OSError:
+                return None
+            return file
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            return [file for file in executor.map(delete_one, files) if file]
+
+    def run(self):
+        """Возвращает (число удалённых файлов, освобождено байт)."""
+        now = time.time()
+        live = live_images()
+        # Миниатюры переписываются до удаления источников, иначе
+        # удалённые sorl файлы не попали бы в отчёт.
+        thumbnails = list(walk(THUMBNAILS_DIR))
+        deleted = self.delete(self.orphan_sources(live, now))
+        if not self.dry_run:
+            self.forget_sources(name for name, _ in deleted)
+        gone, cached, orphans = self.sort_thumbnails(thumbnails, now)
+        deleted += self.delete(orphans)
+        evicted = self.delete(self.evict(cached))
+        if not self.dry_run:
+            for name, _ in evicted:
+                self.kvstore.delete(
+                    ImageFile(name, default_storage), delete_thumbnails=False
+                )
+            if evicted or gone:
+                invalidate_variants()
+        files = deleted + gone + evicted
+        return len(files), sum(size for _, size in files)
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .links import group_url, post_url
+
 User = get_user_model()
 
 
@@ -34,12 +36,35 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False
+    )
+    popularity = models.FloatField(
+        'Популярность',
+        default=0,
+        editable=False
+    )
 
     def __str__(self) -> str:
         return f'{self.text}'
 
+    def get_absolute_url(self):
+        return post_url(self.pk)
+
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='posts_post_feed_idx'
+            ),
+            models.Index(
+                fields=['-popularity', '-id'],
+                name='posts_post_popular_idx'
+            ),
+        ]
 
 
 class Group(models.Model):
@@ -50,6 +75,9 @@ class Group(models.Model):
     def __str__(self) -> str:
         return f'{self.title}'
 
+    def get_absolute_url(self):
+        return group_url(self.slug)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -93,3 +121,44 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Пользователь на которого подписываются'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+        ]
+
+
+class FollowSuggestion(models.Model):
+    """Автор, на которого стоит подписаться пользователю.
+
+    Таблицу заполняет команда recommend_follows.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор'
+    )
+    score = models.PositiveIntegerField(
+        'Общих подписок',
+        help_text='Сколько авторов из подписок пользователя '
+                  'подписаны на рекомендуемого'
+    )
+
+    class Meta:
+        ordering = ['-score', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow_suggestion'
+            ),
+        ]
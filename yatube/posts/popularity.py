@@ -0,0 +1,111 @@
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Count
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import signals
+from .models import Comment, Follow, Post
+
+# Точка отсчёта времени для оценки, чтобы числа оставались небольшими.
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+SCORE_FIELDS = ('id', 'pub_date', 'views', 'author_id')
+
+
+def score(pub_date, comments, views, followers):
+    """Оценка популярности поста с затуханием во времени.
+
+    Вес поста растёт логарифмически от комментариев, просмотров и числа
+    подписчиков автора, а каждые decay секунд свежести дают столько же,
+    сколько десятикратный вес. Старые оценки поэтому не нужно
+    пересчитывать по мере старения: порядок постов сохраняется.
+    """
+    config = settings.POPULARITY
+    weight = (
+        1
+        + config['comments'] * comments
+        + config['views'] * views
+        + config['followers'] * followers
+    )
+    age = (pub_date - EPOCH).total_seconds()
+    return math.log10(weight) + age / config['decay']
+
+
+def compute_scores(rows):
+    """Оценки для строк SCORE_FIELDS; три запроса на любую пачку постов."""
+    post_ids = [row[0] for row in rows]
+    author_ids = {row[3] for row in rows}
+    comments = dict(
+        Comment.objects.filter(post_id__in=post_ids).order_by()
+        .values_list('post_id').annotate(Count('id'))
+    )
+    followers = dict(
+        Follow.objects.filter(author_id__in=author_ids).order_by()
+        .values_list('author_id').annotate(Count('id'))
+    )
+    return {
+        post_id: score(
+            pub_date,
+            comments.get(post_id, 0),
+            views,
+            followers.get(author_id, 0),
+        )
+        for post_id, pub_date, views, author_id in rows
+    }
+
+
+def save_scores(scores):
+    Post.objects.bulk_update(
+        [Post(pk=pk, popularity=value) for pk, value in scores.items()],
+        ['popularity'],
+        batch_size=settings.POPULARITY['batch'],
+    )
+
+
+def refresh(post_ids):
+    rows = list(
+        Post.objects.filter(pk__in=post_ids).values_list(*SCORE_FIELDS)
+    )
+    if rows:
+        save_scores(compute_scores(rows))
+
+
+def recompute_all():
+    """Пересчитывает оценки всех постов пачками. Возвращает их число."""
+    batch = settings.POPULARITY['batch']
+    total = 0
+    last_id = 0
+    while True:
+        rows = list(
+            Post.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list(*SCORE_FIELDS)[:batch]
+        )
+        if not rows:
+            return total
+        save_scores(compute_scores(rows))
+        total += len(rows)
+        last_id = rows[-1][0]
+
+
+@receiver(signals.post_changed)
+def score_new_post(sender, post, created, **kwargs):
+    if created:
+        refresh([post.pk])
+
+
+@receiver(signals.posts_created)
+def score_new_posts(sender, posts, **kwargs):
+    refresh([post.pk for post in posts])
+
+
+@receiver(signals.comment_added)
+def rescore_commented_post(sender, comment, **kwargs):
+    refresh([comment.post_id])
+
+
+@receiver(signals.comments_added)
+def rescore_commented_posts(sender, comments, **kwargs):
+    refresh({comment.post_id for comment in comments})
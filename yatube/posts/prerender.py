@@ -0,0 +1,150 @@
+import math
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Paginator
+from django.db import close_old_connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from taskqueue.queue import enqueue_on_commit
+
+from . import signals
+from .models import Group, Post
+
+
+def about_targets():
+    return [(reverse('about:author'), 1), (reverse('about:tech'), 1)]
+
+
+def feed_targets(path, posts, pages):
+    """Первые pages страниц ленты, но не больше, чем в ней есть."""
+    total = math.ceil(posts.count() / settings.POSTS_PER_PAGE)
+    return [(path, page) for page in range(1, min(pages, total or 1) + 1)]
+
+
+def index_targets(pages):
+    return feed_targets(reverse('posts:index'), Post.objects.all(), pages)
+
+
+def group_targets(group, pages):
+    return feed_targets(group.get_absolute_url(), group.posts.all(), pages)
+
+
+def all_targets(pages):
+    targets = about_targets() + index_targets(pages)
+    for group in Group.objects.all():
+        targets += group_targets(group, pages)
+    return targets
+
+
+def output_path(path, page):
+    """Файл для страницы: <путь>/index.html или <путь>/page-<n>.html."""
+    name = 'index.html' if page == 1 else f'page-{page}.html'
+    return os.path.join(settings.PRERENDER_ROOT, path.strip('/'), name)
+
+
+def render_page(path, page=1):
+    request = RequestFactory().get(path, {'page': page} if page > 1 else {})
+    request.user = AnonymousUser()
+    request.resolver_match = match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response.content
+
+
+def write_page(path, page):
+    content = render_page(path, page)
+    target = output_path(path, page)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Запись через временный файл, чтобы сервер не отдал половину страницы.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target))
+    with os.fdopen(fd, 'wb') as file:
+        file.write(content)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, target)
+    return target
+
+
+def write_page_in_thread(target):
+    try:
+        return write_page(*target)
+    finally:
+        close_old_connections()
+
+
+def prerender(targets, workers=1):
+    if workers <= 1:
+        return [write_page(path, page) for path, page in targets]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(write_page_in_thread, targets))
+
+
+def enabled():
+    # Пока команда prerender не запускалась, обновлять нечего.
+    return os.path.isdir(settings.PRERENDER_ROOT)
+
+
+def clear_index_fragments(pages):
+    """Сбрасывает фрагмент index_page из posts/index.html.
+
+    Иначе пересобранная страница повторила бы закешированную ленту.
+    """
+    paginator = Paginator(Post.objects.all(), settings.POSTS_PER_PAGE)
+    cache.delete_many([
+        make_template_fragment_key('index_page', [paginator.page(number)])
+        for number in range(1, min(pages, paginator.num_pages) + 1)
+    ])
+
+
+def prerender_feeds(groups):
+    """Пересобирает главную ленту и ленты групп groups."""
+    if not enabled():
+        return
+    clear_index_fragments(settings.PRERENDER_PAGES)
+    targets = index_targets(settings.PRERENDER_PAGES)
+    for group in groups:
+        targets += group_targets(group, settings.PRERENDER_PAGES)
+    prerender(targets)
+
+
+@receiver(signals.post_changed)
+def prerender_post_feeds(sender, post, previous_group_id=None, **kwargs):
+    groups = [post.group] if post.group is not None else []
+    if previous_group_id is not None:
+        groups += Group.objects.filter(pk=previous_group_id)
+    prerender_feeds(groups)
+
+
+@receiver(post_delete, sender=Post)
+def prerender_after_delete(sender, instance, **kwargs):
+    if enabled():
+        group_ids = [instance.group_id] if instance.group_id else []
+        enqueue_on_commit(
+            'posts.prerender_feeds', {'group_ids': group_ids},
+            key=f'prerender_feeds:{instance.group_id}'
+        )
+
+
+@receiver(signals.posts_created)
+def prerender_batch_feeds(sender, posts, **kwargs):
+    groups = {post.group_id: post.group for post in posts if post.group}
+    prerender_feeds(groups.values())
+
+
+@receiver(post_save, sender=Group)
+def prerender_group(sender, instance, **kwargs):
+    if enabled():
+        enqueue_on_commit(
+            'posts.prerender_group',
+            {'group_id': instance.pk},
+            key=f'prerender_group:{instance.pk}'
+        )
@@ -0,0 +1,122 @@
+from django.utils import formats
+from django.utils.timezone import template_localtime
+
+from .links import group_url, post_url, profile_url
+from .models import Group, Post, User
+
+# Колонки, которые нужны карточке поста (posts/includes/post_card.html).
+CARD_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'image',
+    'views',
+    'author_id',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group_id',
+    'group__slug',
+    'group__title',
+)
+CARD_DATE_FORMAT = 'd E Y'
+
+
+class Card:
+    """Лёгкая замена экземпляра модели только для чтения.
+
+    Карточка равна экземпляру модели с тем же pk, поэтому её можно
+    сравнивать с объектами ORM и искать среди них.
+    """
+    __slots__ = ()
+    model = None
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_absolute_url(self):
+        return self.url
+
+    def __eq__(self, other):
+        if isinstance(other, (type(self), self.model)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.model, self.pk))
+
+
+class AuthorCard(Card):
+    __slots__ = ('id', 'username', 'full_name', 'url')
+    model = User
+
+    def __init__(self, id, username, first_name, last_name):
+        self.id = id
+        self.username = username
+        self.full_name = f'{first_name} {last_name}'.strip()
+        self.url = profile_url(username)
+
+    def get_full_name(self):
+        return self.full_name
+
+    def __str__(self):
+        return self.username
+
+
+class GroupCard(Card):
+    __slots__ = ('id', 'slug', 'title', 'url')
+    model = Group
+
+    def __init__(self, id, slug, title):
+        self.id = id
+        self.slug = slug
+        self.title = title
+        self.url = group_url(slug)
+
+    def __str__(self):
+        return self.title
+
+
+class PostCard(Card):
+    __slots__ = (
+        'id', 'text', 'pub_date', 'pub_date_display', 'image', 'views',
+        'author', 'group', 'url',
+    )
+    model = Post
+
+    def __init__(self, row, authors, groups):
+        (self.id, self.text, self.pub_date, self.image, self.views,
+         author_id, username, first_name, last_name,
+         group_id, slug, title) = row
+        self.pub_date_display = formats.date_format(
+            template_localtime(self.pub_date), CARD_DATE_FORMAT
+        )
+        self.url = post_url(self.id)
+        # Автор и группа общие для всех карточек страницы.
+        self.author = authors.get(author_id)
+        if self.author is None:
+            self.author = authors[author_id] = AuthorCard(
+                author_id, username, first_name, last_name
+            )
+        self.group = None
+        if group_id is not None:
+            self.group = groups.get(group_id)
+            if self.group is None:
+                self.group = groups[group_id] = GroupCard(
+                    group_id, slug, title
+                )
+
+    def __str__(self):
+        return self.text
+
+
+def post_cards(rows):
+    authors = {}
+    groups = {}
+    return [PostCard(row, authors, groups) for row in rows]
+
+
+def card_rows(posts):
+    """Запрос только колонок карточки; строки передаются в post_cards."""
+    return posts.values_list(*CARD_FIELDS)
@@ -0,0 +1,14 @@
+from django.dispatch import Signal
+
+# События об изменении контента. Отправляются из фоновых задач
+# posts.tasks после фиксации транзакции, в которой произошло изменение.
+# previous_group_id — группа, из которой пост перенесли при правке.
+post_changed = Signal(
+    providing_args=['post', 'created', 'previous_group_id']
+)
+comment_added = Signal(providing_args=['comment'])
+follow_changed = Signal(providing_args=['user', 'author', 'following'])
+# Пачки новых постов и комментариев из пакетного API: получатели
+# обновляют кеши один раз на пачку, а не на каждую запись.
+posts_created = Signal(providing_args=['posts'])
+comments_added = Signal(providing_args=['comments'])
@@ -0,0 +1,229 @@
+import gzip
+import json
+import os
+import tempfile
+from itertools import chain, islice
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .links import group_url, post_url, profile_url
+from .models import Group, Post, User
+
+INDEX_NAME = 'sitemap.xml'
+MANIFEST_NAME = 'manifest.json'
+SHARD_NAME = 'sitemap-{}-{}.xml.gz'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+class Section:
+    """Часть карты сайта: строки queryset по возрастанию (date_field, pk).
+
+    Новые строки всегда оказываются в конце такого порядка, поэтому
+    позиция последней записанной строки — водяной знак, после которого
+    начинается следующая пересборка.
+    """
+
+    def __init__(self, name, queryset, fields, location, date_field=None,
+                 lastmod=False):
+        self.name = name
+        self.queryset = queryset
+        self.fields = fields
+        # Строка -> адрес страницы относительно корня сайта.
+        self.location = location
+        self.date_field = date_field
+        # Писать ли дату строки в <lastmod> адреса.
+        self.lastmod = lastmod
+
+    def moment(self, row):
+        return row[1] if self.date_field else None
+
+    def after(self, mark):
+        if mark is None:
+            return Q()
+        value, pk = mark
+        if not self.date_field:
+            return Q(pk__gt=pk)
+        moment = parse_datetime(value)
+        return (
+            Q(**{f'{self.date_field}__gt': moment})
+            | Q(**{self.date_field: moment, 'pk__gt': pk})
+        )
+
+    def rows(self, mark):
+        date_fields = [self.date_field] if self.date_field else []
+        return self.queryset.filter(self.after(mark)).order_by(
+            *date_fields, 'pk'
+        ).values_list('pk', *date_fields, *self.fields).iterator(
+            chunk_size=settings.SITEMAPS['chunk']
+        )
+
+    def has_rows(self, mark):
+        return self.queryset.filter(self.after(mark)).exists()
+
+    def watermark(self, row):
+        moment = self.moment(row)
+        return [moment.isoformat() if moment else None, row[0]]
+
+
+SECTIONS = (
+    Section(
+        'posts', Post.objects.all(), (),
+        lambda row: post_url(row[0]),
+        date_field='pub_date', lastmod=True,
+    ),
+    Section(
+        'groups', Group.objects.all(), ('slug',),
+        lambda row: group_url(row[1]),
+    ),
+    Section(
+        'profiles', User.objects.filter(is_active=True), ('username',),
+        lambda row: profile_url(row[2]),
+        date_field='date_joined',
+    ),
+)
+
+
+def atomic_write(path, opener=open, mode='w'):
+    """Файл, который заменит path только после успешной записи."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    os.close(fd)
+    return AtomicFile(tmp, path, opener(tmp, mode, encoding='utf-8'))
+
+
+class AtomicFile:
+    def __init__(self, tmp, path, file):
+        self.tmp = tmp
+        self.path = path
+        self.file = file
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.file.close()
+        if exc_type is not None:
+            os.unlink(self.tmp)
+            return
+        os.chmod(self.tmp, 0o644)
+        os.replace(self.tmp, self.path)
+
+
+def url_entry(section, row):
+    loc = escape(settings.SITEMAPS['base_url'] + section.location(row))
+    if section.lastmod:
+        lastmod = section.moment(row).isoformat()
+        return f'<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>\n'
+    return f'<url><loc>{loc}</loc></url>\n'
+
+
+def write_shard(section, number, rows, mark):
+    """Пишет rows в сжатый шард и возвращает его запись для манифеста."""
+    name = SHARD_NAME.format(section.name, number)
+    count = 0
+    last = None
+    with atomic_write(
+        os.path.join(settings.SITEMAP_ROOT, name), gzip.open, 'wt'
+    ) as file:
+        file.write(f'{HEADER}<urlset xmlns="{XMLNS}">\n')
+        for last in rows:
+            file.write(url_entry(section, last))
+            count += 1
+        file.write('</urlset>\n')
+    return {
+        'file': name,
+        'count': count,
+        'after': mark,
+        'last': section.watermark(last),
+        'lastmod': timezone.now().isoformat(),
+    }
+
+
+def update_section(section, shards):
+    """Дописывает в шарды секции строки, появившиеся после водяного знака.
+
+    Неполный последний шард пересобирается вместе с новыми строками,
+    полные не трогаются. Каждый шард пишется потоком из iterator(), так
+    что в памяти не бывает больше одной порции строк.
+    """
+    size = settings.SITEMAPS['shard_size']
+    shards = list(shards)
+    if shards and not section.has_rows(shards[-1]['last']):
+        return shards, 0
+    mark = shards[-1]['last'] if shards else None
+    if shards and shards[-1]['count'] < size:
+        mark = shards.pop()['after']
+    rows = section.rows(mark)
+    written = 0
+    while True:
+        first = next(rows, None)
+        if first is None:
+            return shards, written
+        shard = write_shard(
+            section, len(shards) + 1,
+            chain([first], islice(rows, size - 1)), mark
+        )
+        shards.append(shard)
+        written += shard['count']
+        mark = shard['last']
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(settings.SITEMAP_ROOT, MANIFEST_NAME)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def write_index(manifest):
+    base_url = settings.SITEMAPS['base_url']
+    path = os.path.join(settings.SITEMAP_ROOT, INDEX_NAME)
+    with atomic_write(path) as file:
+        file.write(f'{HEADER}<sitemapindex xmlns="{XMLNS}">\n')
+        for section in SECTIONS:
+            for shard in manifest.get(section.name, []):
+                loc = escape(f'{base_url}/sitemaps/{shard["file"]}')
+                file.write(
+                    f'<sitemap><loc>{loc}</loc>'
+                    f'<lastmod>{shard["lastmod"]}</lastmod></sitemap>\n'
+                )
+        file.write('</sitemapindex>\n')
+
+
+def remove_stale(manifest):
+    keep = {INDEX_NAME, MANIFEST_NAME} | {
+        shard['file'] for shards in manifest.values() for shard in shards
+    }
+    for entry in os.scandir(settings.SITEMAP_ROOT):
+        if entry.name.startswith('sitemap-') and entry.name not in keep:
+            os.unlink(entry.path)
+
+
+def build(full=False):
+    """Обновляет карту сайта в SITEMAP_ROOT. Возвращает число записанных
+    адресов.
+
+    full=True пересобирает всё с нуля: так из карты уходят удалённые
+    посты и пользователи и обновляются адреса переименованных групп,
+    которых инкрементальная сборка не замечает.
+    """
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    manifest = {} if full else load_manifest()
+    total = 0
+    for section in SECTIONS:
+        manifest[section.name], written = update_section(
+            section, manifest.get(section.name, [])
+        )
+        total += written
+    write_index(manifest)
+    manifest_path = os.path.join(settings.SITEMAP_ROOT, MANIFEST_NAME)
+    with atomic_write(manifest_path) as file:
+        json.dump(manifest, file)
+    if full:
+        remove_stale(manifest)
+    return total
@@ -0,0 +1,150 @@
+import io
+from hashlib import md5
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+)
+from django.utils.cache import patch_cache_control
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from . import versions
+from .read_models import CARD_FIELDS, PostCard, card_rows
+
+FEED_KEY = 'feed:{}'
+ENCODING = 'utf-8'
+
+
+class StreamingFeed:
+    """Лента, которая отдаёт XML порциями по мере чтения постов.
+
+    Заголовок и хвост документа пишутся обычным write() без записей, а
+    записи вставляются между ними по одной, так что ни список постов,
+    ни документ целиком не собираются в памяти до первого байта ответа.
+    """
+    root_tag = None
+    item_tag = None
+    updated = None
+
+    def latest_post_date(self):
+        return self.updated or super().latest_post_date()
+
+    def stream(self, entries):
+        document = self.writeString(ENCODING).encode(ENCODING)
+        position = document.rindex(f'</{self.root_tag}>'.encode())
+        yield document[:position]
+        buffer = io.BytesIO()
+        handler = SimplerXMLGenerator(buffer, ENCODING)
+        for entry in entries:
+            self.add_item(**entry)
+            item = self.items.pop()
+            handler.startElement(self.item_tag, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_tag)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield document[position:]
+
+
+class AtomFeed(StreamingFeed, Atom1Feed):
+    root_tag = 'feed'
+    item_tag = 'entry'
+
+
+class RssFeed(StreamingFeed, Rss201rev2Feed):
+    root_tag = 'channel'
+    item_tag = 'item'
+
+
+FORMATS = {'atom': AtomFeed, 'rss': RssFeed}
+
+
+def entries(request, rows):
+    authors = {}
+    groups = {}
+    for row in rows:
+        card = PostCard(row, authors, groups)
+        link = request.build_absolute_uri(card.url)
+        yield {
+            'title': Truncator(card.text).words(
+                settings.FEEDS['title_words']
+            ),
+            'link': link,
+            'unique_id': link,
+            'description': card.text,
+            'pubdate': card.pub_date,
+            'author_name': card.author.full_name or card.author.username,
+            'author_link': request.build_absolute_uri(card.author.url),
+            'categories': [card.group.title] if card.group else (),
+        }
+
+
+def cached_stream(key, chunks):
+    """Отдаёт порции дальше и кладёт собранный документ в кеш."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(parts), settings.FEEDS['timeout'])
+
+
+def render(request, feed_class, posts, title, link, description):
+    """Порции XML ленты; первый пост читается заранее ради даты ленты."""
+    rows = card_rows(posts).order_by('-pub_date', '-pk')[
+        :settings.FEEDS['items']
+    ].iterator()
+    first = next(rows, None)
+    feed = feed_class(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description or title,
+        feed_url=request.build_absolute_uri(),
+        language=settings.LANGUAGE_CODE,
+    )
+    if first is None:
+        return feed.stream(())
+    feed.updated = first[CARD_FIELDS.index('pub_date')]
+    return feed.stream(entries(request, chain([first], rows)))
+
+
+def feed_response(request, posts, scopes, title, link, description=''):
+    """Atom (или RSS при ?format=rss) для последних постов posts.
+
+    Документ кешируется до следующего изменения областей scopes
+    (posts.versions), а его ETag выводится из тех же версий. Поэтому
+    повторный опрос с If-None-Match получает 304, не трогая ни базу, ни
+    кеш документа, а после нового поста лента пересобирается и
+    отдаётся потоком, пока строки читаются из базы.
+    """
+    feed_class = FORMATS.get(request.GET.get('format', 'atom'))
+    if feed_class is None:
+        raise Http404('Неизвестный формат ленты')
+    parts = [request.build_absolute_uri(), *versions.current(*scopes)]
+    digest = md5('|'.join(parts).encode()).hexdigest()
+    etag = f'"{digest}"'
+    key = FEED_KEY.format(digest)
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        body = cache.get(key)
+        if body is not None:
+            response = HttpResponse(
+                body, content_type=feed_class.content_type
+            )
+        else:
+            response = StreamingHttpResponse(
+                cached_stream(key, render(
+                    request, feed_class, posts, title, link, description
+                )),
+                content_type=feed_class.content_type,
+            )
+    response['ETag'] = etag
+    patch_cache_control(
+        response, public=True, max_age=settings.FEEDS['max_age']
+    )
+    return response
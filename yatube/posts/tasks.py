@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.dispatch import receiver
+
+from core.thumbnails import generate_variants
+from taskqueue.queue import register
+
+from . import prerender, signals
+from .models import Comment, Follow, Group, Post, User
+
+
+@register('posts.post_changed')
+def post_changed(post_id, created, previous_group_id=None):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is not None:
+        signals.post_changed.send(
+            sender=Post, post=post, created=created,
+            previous_group_id=previous_group_id
+        )
+
+
+@register('posts.comment_added')
+def comment_added(comment_id):
+    comment = Comment.objects.select_related('post', 'author').filter(
+        pk=comment_id
+    ).first()
+    if comment is not None:
+        signals.comment_added.send(sender=Comment, comment=comment)
+
+
+@register('posts.posts_created')
+def posts_created(post_ids):
+    posts = list(Post.objects.select_related('author', 'group').filter(
+        pk__in=post_ids
+    ).order_by('pk'))
+    if posts:
+        signals.posts_created.send(sender=Post, posts=posts)
+
+
+@register('posts.comments_added')
+def comments_added(comment_ids):
+    comments = list(Comment.objects.select_related('post', 'author').filter(
+        pk__in=comment_ids
+    ).order_by('pk'))
+    if comments:
+        signals.comments_added.send(sender=Comment, comments=comments)
+
+
+@register('posts.follow_changed')
+def follow_changed(user_id, author_id):
+    users = User.objects.in_bulk([user_id, author_id])
+    if len(users) == 2:
+        # Состояние читается заново: подписка могла смениться отпиской,
+        # пока задача ждала в очереди.
+        signals.follow_changed.send(
+            sender=User,
+            user=users[user_id],
+            author=users[author_id],
+            following=Follow.objects.filter(
+                user_id=user_id, author_id=author_id
+            ).exists(),
+        )
+
+
+@register('posts.prerender_feeds')
+def prerender_feeds(group_ids):
+    prerender.prerender_feeds(Group.objects.filter(pk__in=group_ids))
+
+
+@register('posts.prerender_group')
+def prerender_group(group_id):
+    group = Group.objects.filter(pk=group_id).first()
+    if group is not None:
+        prerender.prerender(
+            prerender.group_targets(group, settings.PRERENDER_PAGES)
+        )
+
+
+@receiver(signals.post_changed)
+def warm_thumbnails(sender, post, **kwargs):
+    # Вариант 960 JPEG совпадает с миниатюрой на странице поста.
+    if post.image:
+        generate_variants(post.image)
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
@@ -95,6 +96,21 @@ class Test(TestCase):
                 group=self.group.id,
                 text=form_data['text']).exists())
 
+    # Перенос в другую группу сообщает о прежней группе
+    def test_edit_post_reports_previous_group(self):
+        other = Group.objects.create(title='Другая', slug='other')
+        with mock.patch('posts.views.notify_post_changed') as notify:
+            self.authorized_client_author.post(
+                reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+                data={'text': 'Перенесённый пост', 'group': other.id},
+            )
+        post, = notify.call_args[0]
+        self.assertEqual(post.group_id, other.id)
+        self.assertEqual(
+            notify.call_args[1],
+            {'created': False, 'previous_group_id': self.group.id}
+        )
+
     def test_create_post_not_authorized_user(self):
         posts_count = Post.objects.count()
         form_data = {
@@ -0,0 +1,128 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import fragments, versions
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_PER_PAGE=3)
+class FeedFragmentsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост номер {i}', group=cls.group
+            )
+            for i in range(8)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def scroll(self, url, client=None):
+        """Все порции ленты по цепочке курсоров."""
+        client = client or self.client
+        batches = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            batches.append([
+                post.pk for post in response.context['posts']
+            ])
+            cursor = response.get('X-Next-Cursor')
+            url = cursor and f'{response.wsgi_request.path}?cursor={cursor}'
+        return batches
+
+    def expected(self):
+        ids = [post.pk for post in reversed(self.posts)]
+        return [ids[0:3], ids[3:6], ids[6:8]]
+
+    def test_cursor_walks_every_feed(self):
+        self.client.force_login(self.reader)
+        for url in (
+            reverse('posts:index_fragment'),
+            reverse('posts:group_fragment', args=['group']),
+            reverse('posts:profile_fragment', args=['author']),
+            reverse('posts:follow_fragment'),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.scroll(url), self.expected())
+
+    def test_fragment_has_no_page_chrome(self):
+        response = self.client.get(reverse('posts:index_fragment'))
+        self.assertNotContains(response, '<html')
+        self.assertNotContains(response, 'Page navigation')
+        self.assertContains(response, 'Пост номер 7')
+        self.assertEqual(
+            response['Link'],
+            f'<{reverse("posts:index_fragment")}?'
+            f'cursor={response["X-Next-Cursor"]}>; rel="next"'
+        )
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_full_page_links_to_next_fragment(self):
+        response = self.client.get(reverse('posts:index'), {'page': 2})
+        self.assertEqual(
+            response.context['next_fragment'],
+            reverse('posts:index_fragment') + '?cursor='
+            + fragments.encode_cursor(response.context['page_obj'][-1])
+        )
+        self.assertContains(response, 'data-next-fragment')
+        response = self.client.get(reverse('posts:index'), {'page': 3})
+        self.assertIsNone(response.context['next_fragment'])
+
+    # Страница и фрагменты идут по одному ключу и при равных pub_date
+    def test_page_and_fragment_share_order(self):
+        Post.objects.update(pub_date=timezone.now())
+        page = self.client.get(reverse('posts:index'))
+        ids = [post.pk for post in page.context['page_obj']]
+        url = page.context['next_fragment']
+        batches = self.scroll(url)
+        ids += [pk for batch in batches for pk in batch]
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+
+    def test_fragments_are_cached_per_cursor(self):
+        url = reverse('posts:index_fragment')
+        self.client.get(url)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertNotContains(self.client.get(url), 'Новый пост')
+        # Так версию ленты поднимает notify_post_changed после фиксации.
+        versions.bump(*versions.post_scopes(post))
+        self.assertContains(self.client.get(url), 'Новый пост')
+
+    def test_follow_fragment_is_private(self):
+        url = reverse('posts:follow_fragment')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.reader)
+        self.assertIn('private', self.client.get(url)['Cache-Control'])
+
+    def test_bad_cursor(self):
+        for cursor in ('???', 'bm90LWpzb24', 'WzEsIDJd'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:index_fragment'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 400)
+
+    # Испорченный курсор отбивается до обращения к кешу
+    def test_bad_cursor_skips_cache(self):
+        with mock.patch.object(fragments, 'cache') as fragment_cache:
+            response = self.client.get(
+                reverse('posts:index_fragment'), {'cursor': '???'}
+            )
+        self.assertEqual(response.status_code, 400)
+        fragment_cache.get.assert_not_called()
+        fragment_cache.set.assert_not_called()
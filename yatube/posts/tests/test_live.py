@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.events import CacheBroker, LocalBroker, get_broker
+
+from .. import live, signals
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+LOCAL_BROKER = {'BACKEND': 'core.events.LocalBroker', 'history': 10}
+# Поток отдаёт накопленные события и сразу закрывается.
+SHORT_STREAM = {'enabled': True, 'heartbeat': 0, 'max_age': 0, 'retry': 3}
+
+
+class BrokerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def check_broker(self, broker):
+        subscription = broker.subscribe(['a', 'b'])
+        self.assertEqual(subscription.wait(0), [])
+        first = broker.publish('a', {'n': 1})
+        broker.publish('c', {'n': 2})
+        third = broker.publish('b', {'n': 3})
+        self.assertEqual(
+            subscription.wait(1),
+            [(first, 'a', {'n': 1}), (third, 'b', {'n': 3})]
+        )
+        self.assertEqual(subscription.wait(0), [])
+        # Переподключение с Last-Event-ID получает пропущенное.
+        resumed = broker.subscribe(['b'], last_id=first)
+        self.assertEqual(resumed.wait(1), [(third, 'b', {'n': 3})])
+        subscription.close()
+        resumed.close()
+
+    def test_local_broker(self):
+        broker = LocalBroker()
+        self.check_broker(broker)
+        self.assertEqual(broker.channels, {})
+
+    def test_cache_broker(self):
+        self.check_broker(CacheBroker(poll=0.01))
+
+    # Last-Event-ID от клиента не выходит за backlog и текущий номер
+    def test_cache_broker_clamps_last_id(self):
+        broker = CacheBroker(poll=0.01, backlog=2)
+        ids = [broker.publish('a', {'n': n}) for n in range(4)]
+        old = broker.subscribe(['a'], last_id=0)
+        self.assertEqual(
+            [event[0] for event in old.wait(0)], ids[-2:]
+        )
+        future = broker.subscribe(['a'], last_id=10 ** 9)
+        self.assertEqual(future.last_id, ids[-1])
+        last = broker.publish('a', {'n': 4})
+        self.assertEqual([event[0] for event in future.wait(1)], [last])
+
+
+@override_settings(EVENT_BROKER=LOCAL_BROKER, LIVE_EVENTS=SHORT_STREAM)
+class LiveEventsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        # У каждого теста свой брокер с пустой историей.
+        get_broker.cache_clear()
+
+    def publish_post(self, **kwargs):
+        post = Post.objects.create(author=self.author, text='Пост', **kwargs)
+        signals.post_changed.send(sender=Post, post=post, created=True)
+        return post
+
+    def stream(self, url, last_id=0):
+        response = self.client.get(url, HTTP_LAST_EVENT_ID=str(last_id))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_new_post_is_published_to_its_channels(self):
+        post = self.publish_post(group=self.group)
+        channels = [event[1] for event in get_broker().history]
+        self.assertEqual(channels, [
+            live.ALL_POSTS,
+            live.author_channel(self.author.pk),
+            live.group_channel(self.group.pk),
+        ])
+        self.assertEqual(get_broker().history[0][2], {
+            'id': post.pk, 'author': 'author', 'group': 'group',
+        })
+
+    def test_edits_are_not_published(self):
+        post = self.publish_post()
+        signals.post_changed.send(sender=Post, post=post, created=False)
+        self.assertEqual(len(get_broker().history), 2)
+
+    def test_streams(self):
+        post = self.publish_post(group=self.group)
+        self.client.force_login(self.reader)
+        for url in (
+            reverse('posts:index_events'),
+            reverse('posts:group_events', args=['group']),
+            reverse('posts:profile_events', args=['author']),
+            reverse('posts:follow_events'),
+        ):
+            with self.subTest(url=url):
+                body = self.stream(url)
+                self.assertTrue(body.startswith('retry: 3000\n\n'))
+                self.assertIn('event: post\n', body)
+                self.assertIn(f'"id": {post.pk}', body)
+                self.assertEqual(body.count('event: post'), 1)
+
+    def test_stream_without_events_sends_ping(self):
+        body = self.stream(reverse('posts:index_events'))
+        self.assertEqual(body, 'retry: 3000\n\n: ping\n\n')
+        self.assertEqual(get_broker().channels, {})
+
+    @override_settings(LIVE_EVENTS={**SHORT_STREAM, 'enabled': False})
+    def test_streams_are_off_by_setting(self):
+        response = self.client.get(reverse('posts:index_events'))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'data-live-events')
+
+    def test_banner_on_first_page_only(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'data-live-events="/events/"')
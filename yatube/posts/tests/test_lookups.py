@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.db import transaction
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from ..lookups import (
+    USER_FIELDS, get_group_or_404, get_user_or_404, groups, users
+)
+from ..models import Group
+
+User = get_user_model()
+
+
+# Кеш сбрасывается после фиксации транзакции, поэтому тесты идут без
+# обёртки TestCase в транзакцию.
+class LookupCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        groups.clear_local()
+        users.clear_local()
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Тестовое описание',
+        )
+        self.user = User.objects.create_user(
+            username='auth', password='secret'
+        )
+
+    # Повторный поиск не обращается к базе
+    def test_lookups_are_cached(self):
+        get_group_or_404('test-group')
+        get_user_or_404('auth')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group_or_404('test-group'), self.group)
+            self.assertEqual(get_user_or_404('auth'), self.user)
+
+    # Изменение и переименование сбрасывают кеш
+    def test_save_invalidates_cache(self):
+        get_group_or_404('test-group')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(get_group_or_404('test-group').title,
+                         'Новое название')
+        self.group.slug = 'renamed'
+        self.group.save()
+        with self.assertRaises(Http404):
+            get_group_or_404('test-group')
+        self.assertEqual(get_group_or_404('renamed'), self.group)
+
+    # В кеш попадают только нужные страницам колонки
+    def test_cached_row_has_no_private_fields(self):
+        get_user_or_404('auth')
+        row = users._local['auth'][1]
+        self.assertEqual(row, (self.user.pk, 'auth', '', ''))
+        self.assertEqual(len(row), len(USER_FIELDS))
+        first = get_user_or_404('auth')
+        first.first_name = 'Изменено'
+        self.assertEqual(get_user_or_404('auth').first_name, '')
+        # Сохранение экземпляра из кеша не затирает отложенные поля.
+        first.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password(
+            'secret'
+        ))
+
+    # Пока транзакция не зафиксирована, кеш не сбрасывается
+    def test_invalidated_after_commit(self):
+        get_group_or_404('test-group')
+        with transaction.atomic():
+            self.group.title = 'Новое название'
+            self.group.save()
+            self.assertEqual(
+                get_group_or_404('test-group').title, 'Тестовая группа'
+            )
+        self.assertEqual(
+            get_group_or_404('test-group').title, 'Новое название'
+        )
+
+    def test_delete_invalidates_cache(self):
+        get_user_or_404('auth')
+        self.user.delete()
+        with self.assertRaises(Http404):
+            get_user_or_404('auth')
+
+    # Счётчики попаданий доступны на странице метрик
+    def test_hit_counters_in_metrics(self):
+        get_group_or_404('test-group')
+        get_group_or_404('test-group')
+        response = Client().get(reverse('metrics'))
+        self.assertContains(
+            response,
+            'lookup_cache_requests_total{cache="group",result="local_hit"}'
+        )
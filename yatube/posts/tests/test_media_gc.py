@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core import thumbnails
+
+from ..media_gc import MediaCollector
+from ..models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+HOUR_AGO = time.time() - 60 * 60
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_GC_GRACE=60)
+class MediaGarbageCollectionTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        user = User.objects.create_user(username='auth')
+        Post.objects.create(author=user, text='Пост', image='posts/live.gif')
+        for name in ('posts/live.gif', 'posts/dead.gif', 'cache/ee/stray.jpg'):
+            self.write(name)
+        self.add_source(
+            'posts/live.gif', 'cache/aa/old.jpg', 'cache/aa/new.jpg'
+        )
+        self.add_source('posts/dead.gif', 'cache/cc/dead.jpg')
+        # old.jpg использовалась раньше new.jpg.
+        long_ago = HOUR_AGO - 60 * 60
+        os.utime(self.path('cache/aa/old.jpg'), (long_ago, long_ago))
+
+    def path(self, name):
+        return os.path.join(TEMP_MEDIA_ROOT, name)
+
+    def write(self, name, mtime=HOUR_AGO):
+        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+        with open(self.path(name), 'wb') as file:
+            file.write(SMALL_GIF)
+        os.utime(self.path(name), (mtime, mtime))
+
+    def add_source(self, name, *thumbnails):
+        source = ImageFile(name)
+        default.kvstore.set(source)
+        for thumbnail in thumbnails:
+            self.write(thumbnail)
+            default.kvstore.set(ImageFile(thumbnail), source)
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    def test_orphans_are_deleted(self):
+        out = StringIO()
+        call_command('media_gc', max_bytes=0, workers=2, stdout=out)
+        for name in ('posts/dead.gif', 'cache/cc/dead.jpg',
+                     'cache/ee/stray.jpg'):
+            self.assertFalse(self.exists(name), name)
+        for name in ('posts/live.gif', 'cache/aa/old.jpg',
+                     'cache/aa/new.jpg'):
+            self.assertTrue(self.exists(name), name)
+        self.assertIn(
+            f'Удалено файлов: 3, освобождено байт: {3 * len(SMALL_GIF)}',
+            out.getvalue()
+        )
+        self.assertIsNone(default.kvstore.get(ImageFile('posts/dead.gif')))
+        self.assertIsNone(
+            default.kvstore.get(ImageFile('cache/cc/dead.jpg'))
+        )
+
+    def test_fresh_files_are_kept(self):
+        self.write('posts/uploading.gif', mtime=time.time())
+        MediaCollector().run()
+        self.assertTrue(self.exists('posts/uploading.gif'))
+
+    def test_thumbnail_cache_is_capped_by_last_use(self):
+        MediaCollector(max_bytes=len(SMALL_GIF)).run()
+        self.assertFalse(self.exists('cache/aa/old.jpg'))
+        self.assertTrue(self.exists('cache/aa/new.jpg'))
+        self.assertIsNone(default.kvstore.get(ImageFile('cache/aa/old.jpg')))
+        self.assertIsNotNone(
+            default.kvstore.get(ImageFile('cache/aa/new.jpg'))
+        )
+
+    # После вытеснения страницы не ссылаются на удалённые миниатюры
+    def test_eviction_invalidates_srcset(self):
+        key = thumbnails.variants_key('posts/live.gif')
+        MediaCollector(max_bytes=len(SMALL_GIF)).run()
+        self.assertNotEqual(thumbnails.variants_key('posts/live.gif'), key)
+
+    # Файлы, которые не удалось удалить, не попадают в отчёт
+    def test_failed_deletes_are_not_counted(self):
+        remove = os.remove
+
+        def fail_on_stray(path):
+            if path.endswith('stray.jpg'):
+                raise PermissionError(path)
+            remove(path)
+
+        with mock.patch('posts.media_gc.os.remove', fail_on_stray):
+            count, reclaimed = MediaCollector().run()
+        self.assertTrue(self.exists('cache/ee/stray.jpg'))
+        self.assertEqual((count, reclaimed), (2, 2 * len(SMALL_GIF)))
+
+    def test_dry_run_deletes_nothing(self):
+        count, reclaimed = MediaCollector(
+            max_bytes=len(SMALL_GIF), dry_run=True
+        ).run()
+        self.assertEqual(count, 4)
+        self.assertEqual(reclaimed, 4 * len(SMALL_GIF))
+        for name in ('posts/dead.gif', 'cache/aa/old.jpg'):
+            self.assertTrue(self.exists(name))
+        self.assertIsNotNone(default.kvstore.get(ImageFile('posts/dead.gif')))
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import popularity, signals
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class PopularityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def popular_ids(self):
+        response = self.client.get(reverse('posts:popular'))
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_score_decays_with_age(self):
+        now = timezone.now()
+        fresh = popularity.score(now, 0, 0, 0)
+        day_old = popularity.score(now - timedelta(days=1), 0, 0, 0)
+        self.assertGreater(fresh, day_old)
+        # Старый пост догоняет свежий, набрав достаточно комментариев.
+        self.assertGreater(
+            popularity.score(now - timedelta(days=1), 100, 0, 0), fresh
+        )
+
+    def test_comment_raises_post_in_popular_feed(self):
+        popularity.recompute_all()
+        oldest, _, newest = self.posts
+        self.assertEqual(self.popular_ids()[0], newest.pk)
+        for i in range(5):
+            comment = Comment.objects.create(
+                post=oldest, author=self.reader, text=f'Комментарий {i}'
+            )
+        signals.comment_added.send(sender=Comment, comment=comment)
+        cache.clear()
+        self.assertEqual(self.popular_ids()[0], oldest.pk)
+
+    def test_new_post_is_scored(self):
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        signals.post_changed.send(sender=Post, post=post, created=True)
+        post.refresh_from_db()
+        self.assertGreater(post.popularity, 0)
+
+    def test_recompute_counts_views_and_followers(self):
+        call_command('recompute_popularity', stdout=StringIO())
+        post = Post.objects.get(pk=self.posts[0].pk)
+        before = post.popularity
+        Post.objects.filter(pk=post.pk).update(views=100)
+        Follow.objects.create(user=self.reader, author=self.author)
+        out = StringIO()
+        call_command('recompute_popularity', stdout=out)
+        self.assertIn('Пересчитано постов: 3', out.getvalue())
+        post.refresh_from_db()
+        self.assertGreater(post.popularity, before)
+
+    def test_popular_feed_query_count(self):
+        popularity.recompute_all()
+        with self.assertNumQueries(2):
+            self.client.get(reverse('posts:popular'))
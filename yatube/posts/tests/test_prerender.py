@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import prerender, signals, tasks
+from ..models import Group, Post
+
+PRERENDER_ROOT = os.path.join(
+    tempfile.mkdtemp(dir=settings.BASE_DIR), 'prerendered'
+)
+
+User = get_user_model()
+
+
+@override_settings(PRERENDER_ROOT=PRERENDER_ROOT, POSTS_PER_PAGE=2)
+class PrerenderTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Тестовое описание',
+        )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user, text=f'Тестовый пост {i}', group=cls.group
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(os.path.dirname(PRERENDER_ROOT), ignore_errors=True)
+
+    def read(self, *parts):
+        with open(os.path.join(PRERENDER_ROOT, *parts)) as file:
+            return file.read()
+
+    def test_prerender_writes_pages(self):
+        call_command('prerender', pages=5, workers=1, stdout=StringIO())
+        self.assertIn('Об авторе', self.read('about', 'author', 'index.html'))
+        self.assertIn('Тестовый пост 2', self.read('index.html'))
+        self.assertIn('Тестовый пост 0', self.read('page-2.html'))
+        self.assertNotIn('Тестовый пост 0', self.read('index.html'))
+        self.assertIn(
+            'Тестовое описание',
+            self.read('group', 'test-group', 'index.html')
+        )
+        # Страниц больше, чем есть в ленте, не создаётся
+        self.assertFalse(
+            os.path.exists(os.path.join(PRERENDER_ROOT, 'page-3.html'))
+        )
+
+    # Новый пост пересобирает первые страницы лент
+    def test_post_changed_rerenders_feeds(self):
+        call_command('prerender', workers=1, stdout=StringIO())
+        post = Post.objects.create(
+            author=self.user, text='Свежий пост', group=self.group
+        )
+        signals.post_changed.send(sender=Post, post=post, created=True)
+        self.assertIn('Свежий пост', self.read('index.html'))
+        self.assertIn(
+            'Свежий пост', self.read('group', 'test-group', 'index.html')
+        )
+
+    # Перенос поста пересобирает и ленту прежней группы
+    def test_moved_post_rerenders_previous_group(self):
+        other = Group.objects.create(title='Другая', slug='other')
+        call_command('prerender', workers=1, stdout=StringIO())
+        post = Post.objects.filter(group=self.group).latest('pub_date')
+        post.group = other
+        post.save()
+        signals.post_changed.send(
+            sender=Post, post=post, created=False,
+            previous_group_id=self.group.pk
+        )
+        self.assertNotIn(
+            post.text, self.read('group', 'test-group', 'index.html')
+        )
+        self.assertIn(post.text, self.read('group', 'other', 'index.html'))
+
+    # Удаление поста ставит в очередь пересборку его лент
+    def test_deleted_post_rerenders_feeds(self):
+        call_command('prerender', workers=1, stdout=StringIO())
+        post = Post.objects.create(
+            author=self.user, text='Удаляемый пост', group=self.group
+        )
+        call_command('prerender', workers=1, stdout=StringIO())
+        with mock.patch.object(prerender, 'enqueue_on_commit') as enqueue:
+            post.delete()
+        enqueue.assert_called_once_with(
+            'posts.prerender_feeds', {'group_ids': [self.group.pk]},
+            key=f'prerender_feeds:{self.group.pk}'
+        )
+        tasks.prerender_feeds([self.group.pk])
+        self.assertNotIn('Удаляемый пост', self.read('index.html'))
+        self.assertNotIn(
+            'Удаляемый пост', self.read('group', 'test-group', 'index.html')
+        )
@@ -0,0 +1,138 @@
+import gzip
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import sitemaps
+from ..models import Group, Post
+
+SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+User = get_user_model()
+
+
+@override_settings(SITEMAP_ROOT=SITEMAP_ROOT, SITEMAPS={
+    'base_url': 'https://yatube.test', 'shard_size': 2, 'chunk': 1
+})
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        start = timezone.now() - timedelta(days=1)
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        for i, post in enumerate(cls.posts):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=start + timedelta(hours=i)
+            )
+
+    def tearDown(self):
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+
+    def shard(self, name):
+        with gzip.open(os.path.join(SITEMAP_ROOT, name)) as file:
+            root = ElementTree.parse(file).getroot()
+        return [loc.text for loc in root.iter(f'{NS}loc')]
+
+    def index(self):
+        root = ElementTree.parse(
+            os.path.join(SITEMAP_ROOT, sitemaps.INDEX_NAME)
+        ).getroot()
+        return [loc.text.rsplit('/', 1)[1] for loc in root.iter(f'{NS}loc')]
+
+    def post_urls(self, *posts):
+        return [
+            f'https://yatube.test{post.get_absolute_url()}' for post in posts
+        ]
+
+    def test_shards_sections(self):
+        self.assertEqual(sitemaps.build(), 5)
+        self.assertEqual(self.index(), [
+            'sitemap-posts-1.xml.gz',
+            'sitemap-posts-2.xml.gz',
+            'sitemap-groups-1.xml.gz',
+            'sitemap-profiles-1.xml.gz',
+        ])
+        self.assertEqual(
+            self.shard('sitemap-posts-1.xml.gz'),
+            self.post_urls(*self.posts[:2])
+        )
+        self.assertEqual(
+            self.shard('sitemap-groups-1.xml.gz'),
+            ['https://yatube.test/group/group/']
+        )
+        self.assertEqual(
+            self.shard('sitemap-profiles-1.xml.gz'),
+            ['https://yatube.test/profile/author/']
+        )
+
+    def test_incremental_build_appends_after_watermark(self):
+        sitemaps.build()
+        full_shard = os.path.join(SITEMAP_ROOT, 'sitemap-posts-1.xml.gz')
+        mtime = os.stat(full_shard).st_mtime_ns
+        self.assertEqual(sitemaps.build(), 0)
+
+        new = [
+            Post.objects.create(author=self.author, text=f'Новый {i}')
+            for i in range(2)
+        ]
+        # Дописывается неполный шард и один новый, полный не трогается.
+        self.assertEqual(sitemaps.build(), 3)
+        self.assertEqual(os.stat(full_shard).st_mtime_ns, mtime)
+        self.assertEqual(
+            self.shard('sitemap-posts-2.xml.gz'),
+            self.post_urls(self.posts[2], new[0])
+        )
+        self.assertEqual(
+            self.shard('sitemap-posts-3.xml.gz'), self.post_urls(new[1])
+        )
+
+    def test_full_rebuild_drops_deleted(self):
+        sitemaps.build()
+        Post.objects.filter(pk__in=[p.pk for p in self.posts[1:]]).delete()
+        out = StringIO()
+        call_command('build_sitemaps', '--full', stdout=out)
+        self.assertIn('Записано адресов: 3', out.getvalue())
+        self.assertNotIn('sitemap-posts-2.xml.gz', self.index())
+        self.assertFalse(os.path.exists(
+            os.path.join(SITEMAP_ROOT, 'sitemap-posts-2.xml.gz')
+        ))
+
+    def test_served_from_disk(self):
+        self.assertEqual(
+            self.client.get(reverse('posts:sitemap_index')).status_code, 404
+        )
+        sitemaps.build()
+        response = self.client.get(reverse('posts:sitemap_index'))
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        response = self.client.get(
+            reverse('posts:sitemap_shard', args=['sitemap-posts-1.xml.gz'])
+        )
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content))[:5],
+            b'<?xml'
+        )
+        response = self.client.get(
+            reverse('posts:sitemap_shard', args=['manifest.json'])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import suggestions
+from ..models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+class FollowSuggestionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('ann', 'bob', 'cat', 'dan', 'eve')
+        }
+        # ann -> bob, cat; bob -> dan, eve; cat -> dan, ann
+        for user, authors in (
+            ('ann', ('bob', 'cat')),
+            ('bob', ('dan', 'eve')),
+            ('cat', ('dan', 'ann')),
+        ):
+            for author in authors:
+                Follow.objects.create(
+                    user=cls.users[user], author=cls.users[author]
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.users['ann'])
+
+    def suggested(self, name):
+        return [
+            (suggestion.author.username, suggestion.score)
+            for suggestion in FollowSuggestion.objects.filter(
+                user=self.users[name]
+            )
+        ]
+
+    def test_friends_of_friends_ranked_by_common_follows(self):
+        out = StringIO()
+        call_command('recommend_follows', stdout=out)
+        # dan — через bob и cat, eve — только через bob; себя и тех,
+        # на кого уже подписана, ann не видит.
+        self.assertEqual(self.suggested('ann'), [('dan', 2), ('eve', 1)])
+        self.assertEqual(self.suggested('cat'), [('bob', 1)])
+        self.assertEqual(self.suggested('dan'), [])
+        self.assertIn('Сохранено рекомендаций: 3', out.getvalue())
+
+    def test_recompute_replaces_old_suggestions(self):
+        suggestions.recommend(top=1, chunk=2)
+        self.assertEqual(self.suggested('ann'), [('dan', 2)])
+        Follow.objects.filter(user=self.users['ann']).delete()
+        suggestions.recommend(chunk=2)
+        self.assertEqual(self.suggested('ann'), [])
+
+    def test_endpoint_skips_already_followed(self):
+        suggestions.recommend()
+        Follow.objects.create(user=self.users['ann'], author=self.users['dan'])
+        response = self.client.get(reverse('posts:follow_suggestions'))
+        self.assertEqual(response.json(), {'suggestions': [{
+            'username': 'eve',
+            'full_name': '',
+            'url': '/profile/eve/',
+            'score': 1,
+        }]})
+
+    def test_endpoint_limit(self):
+        suggestions.recommend()
+        url = reverse('posts:follow_suggestions')
+        response = self.client.get(url, {'limit': 1})
+        self.assertEqual(len(response.json()['suggestions']), 1)
+        response = self.client.get(url, {'limit': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_widget_on_follow_page(self):
+        suggestions.recommend()
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [s.author.username for s in response.context['suggestions']],
+            ['dan', 'eve']
+        )
+        self.assertContains(response, reverse(
+            'posts:profile_follow', args=['dan']
+        ))
@@ -0,0 +1,125 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import versions
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class SyndicationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост номер {i}', group=cls.group
+            )
+            for i in range(3)
+        ]
+        Post.objects.create(author=cls.other, text='Без группы')
+
+    def setUp(self):
+        cache.clear()
+
+    def fetch(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            body = b''.join(response.streaming_content)
+        else:
+            body = response.content
+        return response, ElementTree.fromstring(body)
+
+    def test_group_feed_lists_group_posts(self):
+        response, root = self.fetch(
+            reverse('posts:group_feed', args=['group'])
+        )
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/atom+xml'
+        ))
+        self.assertEqual(root.find(f'{ATOM}title').text, 'Группа')
+        entries = root.findall(f'{ATOM}entry')
+        self.assertEqual(
+            [entry.find(f'{ATOM}title').text for entry in entries],
+            [f'Пост номер {i}' for i in (2, 1, 0)]
+        )
+        self.assertEqual(
+            entries[0].find(f'{ATOM}link').get('href'),
+            f'http://testserver{self.posts[2].get_absolute_url()}'
+        )
+        self.assertEqual(
+            entries[0].find(f'{ATOM}author/{ATOM}name').text, 'Лев Толстой'
+        )
+
+    def test_profile_and_index_feeds(self):
+        _, root = self.fetch(reverse('posts:profile_feed', args=['other']))
+        self.assertEqual(len(root.findall(f'{ATOM}entry')), 1)
+        _, root = self.fetch(reverse('posts:index_feed'))
+        self.assertEqual(len(root.findall(f'{ATOM}entry')), 4)
+
+    def test_rss_format(self):
+        response, root = self.fetch(
+            reverse('posts:index_feed'), data={'format': 'rss'}
+        )
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/rss+xml'
+        ))
+        self.assertEqual(len(root.findall('channel/item')), 4)
+        response = self.client.get(
+            reverse('posts:index_feed'), {'format': 'json'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_cached_until_new_post(self):
+        url = reverse('posts:group_feed', args=['group'])
+        first, _ = self.fetch(url)
+        self.assertTrue(first.streaming)
+        second, _ = self.fetch(url)
+        self.assertFalse(second.streaming)
+        self.assertEqual(first['ETag'], second['ETag'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        post = Post.objects.create(
+            author=self.author, text='Свежий', group=self.group
+        )
+        versions.bump(*versions.post_scopes(post))
+        response, root = self.fetch(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(
+            root.find(f'{ATOM}entry/{ATOM}title').text, 'Свежий'
+        )
+
+    @override_settings(FEEDS={
+        'items': 2, 'title_words': 1, 'timeout': 60, 'max_age': 30
+    })
+    def test_limits_and_cache_control(self):
+        response, root = self.fetch(reverse('posts:index_feed'))
+        self.assertIn('max-age=30', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+        titles = [
+            entry.find(f'{ATOM}title').text
+            for entry in root.findall(f'{ATOM}entry')
+        ]
+        self.assertEqual(titles, ['Без…', 'Пост…'])
+
+    def test_pages_link_feeds(self):
+        response = self.client.get(
+            reverse('posts:profile', args=['author'])
+        )
+        self.assertContains(
+            response, reverse('posts:profile_feed', args=['author'])
+        )
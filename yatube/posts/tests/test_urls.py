@@ -1,6 +1,7 @@
 from http import HTTPStatus
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
+from django.urls import reverse
 
 from ..models import Group, Post
 
@@ -95,3 +96,20 @@ class URLTests(TestCase):
             with self.subTest(url=url):
                 response = self.authorized_client_author.get(url)
                 self.assertTemplateUsed(response, template)
+
+    def test_absolute_urls_match_reverse(self):
+        user = User.objects.create_user(username='пользователь.тест+1')
+        absolute_urls = {
+            self.post.get_absolute_url(): reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ),
+            self.group.get_absolute_url(): reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            user.get_absolute_url(): reverse(
+                'posts:profile', kwargs={'username': user.username}
+            ),
+        }
+        for absolute_url, expected in absolute_urls.items():
+            with self.subTest(url=expected):
+                self.assertEqual(absolute_url, expected)
@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from .. import versions
+from ..models import Group, Post
+from ..utils import notify_post_changed
+
+User = get_user_model()
+
+
+# Версии поднимаются после фиксации транзакции, поэтому тесты идут без
+# обёртки TestCase в транзакцию.
+class VersionBumpTest(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.old = Group.objects.create(title='Старая', slug='old')
+        self.new = Group.objects.create(title='Новая', slug='new')
+        self.post = Post.objects.create(
+            author=self.author, text='Пост', group=self.old
+        )
+
+    def scopes(self):
+        return versions.current(
+            versions.ALL_POSTS,
+            versions.group_scope(self.old.pk),
+            versions.group_scope(self.new.pk),
+        )
+
+    # Перенос поста меняет версии обеих групп в процессе запроса
+    def test_move_bumps_both_groups_after_commit(self):
+        before = self.scopes()
+        with transaction.atomic():
+            self.post.group = self.new
+            self.post.save()
+            notify_post_changed(
+                self.post, created=False, previous_group_id=self.old.pk
+            )
+            self.assertEqual(self.scopes(), before)
+        after = self.scopes()
+        for old, new in zip(before, after):
+            self.assertNotEqual(old, new)
+
+    def test_delete_bumps_group(self):
+        before = self.scopes()
+        self.post.delete()
+        after = self.scopes()
+        self.assertNotEqual(before[1], after[1])
+        self.assertEqual(before[2], after[2])
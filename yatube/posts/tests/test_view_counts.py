@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import view_counts
+from ..models import Post
+
+User = get_user_model()
+
+VIEW_COUNTER = {'threshold': 1000, 'interval': 3600, 'batch': 2}
+
+
+@override_settings(VIEW_COUNTER=VIEW_COUNTER)
+class ViewCountsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        view_counts._pending.clear()
+        # Настоящий таймер писал бы в базу из другого потока.
+        patcher = mock.patch.object(view_counts.threading, 'Timer')
+        self.timer = patcher.start()
+        self.addCleanup(patcher.stop)
+        view_counts._timer = None
+        self.addCleanup(setattr, view_counts, '_timer', None)
+
+    def views(self):
+        return list(
+            Post.objects.order_by('pk').values_list('views', flat=True)
+        )
+
+    def test_views_are_buffered_until_flush(self):
+        post = self.posts[0]
+        for _ in range(3):
+            response = self.client.get(post.get_absolute_url())
+        self.assertEqual(response.context['post'].views, 3)
+        self.assertEqual(self.views(), [0, 0, 0])
+        self.assertEqual(view_counts.flush(), 3)
+        self.assertEqual(self.views(), [3, 0, 0])
+        self.assertEqual(view_counts.pending(post.pk), 0)
+
+    def test_flush_writes_batched_case_updates(self):
+        for count, post in enumerate(self.posts, start=1):
+            for _ in range(count):
+                view_counts.record_view(post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            view_counts.flush()
+        # Три поста при batch=2 — два UPDATE.
+        self.assertEqual(len(queries), 2)
+        self.assertIn('CASE', queries[0]['sql'])
+        self.assertEqual(self.views(), [1, 2, 3])
+
+    @override_settings(VIEW_COUNTER=dict(VIEW_COUNTER, threshold=2))
+    def test_flush_on_threshold(self):
+        view_counts.record_view(self.posts[0].pk)
+        self.assertEqual(self.views(), [0, 0, 0])
+        view_counts.record_view(self.posts[1].pk)
+        self.assertEqual(self.views(), [1, 1, 0])
+
+    @override_settings(VIEW_COUNTER=dict(VIEW_COUNTER, interval=0))
+    def test_flush_on_interval(self):
+        view_counts.record_view(self.posts[0].pk)
+        self.assertEqual(self.views(), [1, 0, 0])
+
+    def test_failed_flush_keeps_views(self):
+        view_counts.record_view(self.posts[0].pk)
+        with mock.patch.object(
+            view_counts, 'write_counts', side_effect=DatabaseError
+        ), mock.patch.object(view_counts, 'logger'):
+            self.assertEqual(view_counts.flush(), 0)
+        self.assertEqual(view_counts.pending(self.posts[0].pk), 1)
+        view_counts.flush()
+        self.assertEqual(self.views(), [1, 0, 0])
+
+    # Просмотры без новых запросов сбрасывает таймер
+    def test_timer_flushes_idle_buffer(self):
+        view_counts.record_view(self.posts[0].pk)
+        view_counts.record_view(self.posts[1].pk)
+        self.timer.assert_called_once_with(
+            VIEW_COUNTER['interval'], view_counts.run_timer
+        )
+        self.timer.return_value.start.assert_called_once()
+        view_counts.flush_by_timer()
+        self.assertEqual(self.views(), [1, 1, 0])
+        self.assertIsNone(view_counts._timer)
+
+    def test_editing_post_keeps_views(self):
+        post = self.posts[0]
+        # Форма загружает пост до того, как воркер запишет просмотры.
+        loaded = Post.objects.get(pk=post.pk)
+        self.client.force_login(self.user)
+        with mock.patch('posts.views.get_object_or_404', return_value=loaded):
+            Post.objects.filter(pk=post.pk).update(views=5)
+            self.client.post(
+                reverse('posts:post_edit', args=[post.pk]),
+                {'text': 'Новый текст'}
+            )
+        self.assertEqual(self.views(), [5, 0, 0])
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text, 'Новый текст'
+        )
+
+    # Обычный save() сохраняет все поля, в том числе счётчики
+    def test_save_writes_counters(self):
+        post = Post.objects.get(pk=self.posts[0].pk)
+        post.views = 7
+        post.save()
+        self.assertEqual(self.views(), [7, 0, 0])
+
+    def test_post_card_shows_views(self):
+        Post.objects.filter(pk=self.posts[0].pk).update(views=42)
+        response = self.client.get('/')
+        self.assertContains(response, 'Просмотры: 42')
@@ -1,6 +1,7 @@
 from django.core.cache import cache
 import shutil
 import tempfile
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
@@ -10,7 +11,9 @@ from django.urls import reverse
 from django import forms
 
 
+from .. import follows
 from ..models import Group, Post, Follow
+from ..read_models import PostCard
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -69,6 +72,7 @@ class Test(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client_author = Client()
         self.authorized_client_follower = Client()
@@ -264,3 +268,110 @@ class Test(TestCase):
         cache.clear()
         response_3 = self.authorized_client_author.get(reverse('posts:index'))
         self.assertNotEqual(response_3.content, post)
+
+    # Проверяем массовую подписку и отписку
+    def test_follow_bulk(self):
+        url = reverse('posts:follow_bulk')
+        response = self.authorized_client_unfollower.post(url, {
+            'username': [
+                self.user_author.username,
+                self.user_follower.username,
+                self.user_unfollower.username,
+                'missing-user',
+            ],
+        })
+        self.assertEqual(response.json(), {
+            'following': sorted([self.user_author.id, self.user_follower.id]),
+            'missing': ['missing-user'],
+        })
+        # Повторная подписка не создаёт дубликатов
+        self.authorized_client_unfollower.post(
+            url, {'username': [self.user_author.username]}
+        )
+        self.assertEqual(
+            Follow.objects.filter(user=self.user_unfollower).count(), 2
+        )
+        response = self.authorized_client_unfollower.post(url, {
+            'username': [self.user_author.username],
+            'action': 'unfollow',
+        })
+        self.assertEqual(
+            response.json()['following'], [self.user_follower.id]
+        )
+
+    # Проверяем кеш множеств подписок
+    def test_follow_id_sets_are_invalidated(self):
+        self.assertEqual(
+            follows.follower_ids(self.user_author.id),
+            {self.user_follower.id}
+        )
+        self.assertEqual(follows.following_ids(self.user_unfollower.id), set())
+        follows.follow(self.user_unfollower, [self.user_author])
+        self.assertEqual(
+            follows.follower_ids(self.user_author.id),
+            {self.user_follower.id, self.user_unfollower.id}
+        )
+        self.assertEqual(
+            follows.following_ids(self.user_unfollower.id),
+            {self.user_author.id}
+        )
+
+    # Лента подписок фильтруется подзапросом, а не списком id авторов
+    def test_followed_posts_use_subquery(self):
+        posts = follows.followed_posts(self.user_follower)
+        self.assertEqual(
+            posts.query.sql_with_params()[1], (self.user_follower.pk,)
+        )
+        self.assertEqual(
+            set(posts), set(Post.objects.filter(author=self.user_author))
+        )
+
+    # Повторная подписка и отписка без подписки не рассылают событий
+    def test_noop_follow_changes_are_not_notified(self):
+        with mock.patch.object(follows, 'notify_follow_changed') as notify:
+            self.assertEqual(
+                follows.follow(self.user_follower, [self.user_author]), 0
+            )
+            self.assertEqual(
+                follows.unfollow(self.user_unfollower, [self.user_author]), 0
+            )
+        notify.assert_not_called()
+        for username in (self.user_author.username, 'missing-user'):
+            response = self.authorized_client_unfollower.get(reverse(
+                'posts:profile_unfollow', kwargs={'username': username}
+            ))
+            self.assertEqual(response.status_code, 404)
+
+    # Проверяем, что кнопка подписки зависит от смотрящего пользователя
+    def test_profile_following_is_resolved_per_viewer(self):
+        url = reverse(
+            'posts:profile', kwargs={'username': self.user_author.username}
+        )
+        clients = {
+            self.authorized_client_follower: True,
+            self.authorized_client_unfollower: False,
+            self.guest_client: False,
+        }
+        for client, following in clients.items():
+            with self.subTest(following=following):
+                response = client.get(url)
+                self.assertEqual(response.context['following'], following)
+        self.authorized_client_unfollower.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.user_author.username}))
+        response = self.authorized_client_unfollower.get(url)
+        self.assertTrue(response.context['following'])
+
+    # Проверяем, что ленты строятся из карточек с готовыми ссылками
+    def test_feeds_use_post_cards(self):
+        response = self.authorized_client_follower.get(reverse('posts:index'))
+        card = response.context['page_obj'][0]
+        self.assertIsInstance(card, PostCard)
+        self.assertEqual(card, self.first_post)
+        self.assertEqual(card.get_absolute_url(),
+                         self.first_post.get_absolute_url())
+        self.assertEqual(card.author.get_absolute_url(),
+                         self.user_author.get_absolute_url())
+        self.assertEqual(card.group.get_absolute_url(),
+                         self.group_1.get_absolute_url())
+        self.assertContains(response, card.pub_date_display)
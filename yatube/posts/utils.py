@@ -1,9 +1,74 @@
+from django.conf import settings
 from django.core.paginator import Paginator
 
-from yatube.settings import POSTS_PER_PAGE
+from taskqueue.queue import enqueue_on_commit
+
+from . import versions
+from .read_models import card_rows, post_cards
 
 
 def paginate_queryset(request, posts):
-    paginator = Paginator(posts, POSTS_PER_PAGE)
+    paginator = Paginator(posts, settings.POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def paginate_cards(request, posts):
+    """Страница ленты, где посты заменены карточками PostCard."""
+    page_obj = paginate_queryset(request, card_rows(posts))
+    page_obj.object_list = post_cards(page_obj.object_list)
+    return page_obj
+
+
+def notify_post_changed(post, created, previous_group_id=None):
+    """previous_group_id передаётся, если правка перенесла пост из группы:
+    её ленты тоже нужно обновить."""
+    versions.bump_on_commit(*versions.post_scopes(post, previous_group_id))
+    enqueue_on_commit(
+        'posts.post_changed',
+        {
+            'post_id': post.pk,
+            'created': created,
+            'previous_group_id': previous_group_id,
+        },
+        priority=1,
+        key=f'post_changed:{post.pk}:{previous_group_id}'
+    )
+
+
+def notify_comment_added(comment):
+    versions.bump_on_commit(versions.post_scope(comment.post_id))
+    enqueue_on_commit(
+        'posts.comment_added',
+        {'comment_id': comment.pk},
+        key=f'comment_added:{comment.pk}'
+    )
+
+
+def notify_posts_created(posts):
+    versions.bump_on_commit(
+        *{scope for post in posts for scope in versions.post_scopes(post)}
+    )
+    enqueue_on_commit(
+        'posts.posts_created', {'post_ids': [post.pk for post in posts]},
+        priority=1
+    )
+
+
+def notify_comments_added(comments):
+    versions.bump_on_commit(
+        *{versions.post_scope(comment.post_id) for comment in comments}
+    )
+    enqueue_on_commit(
+        'posts.comments_added',
+        {'comment_ids': [comment.pk for comment in comments]}
+    )
+
+
+def notify_follow_changed(user, author):
+    versions.bump_on_commit(versions.following_scope(user.pk))
+    enqueue_on_commit(
+        'posts.follow_changed',
+        {'user_id': user.pk, 'author_id': author.pk},
+        key=f'follow_changed:{user.pk}:{author.pk}'
+    )
@@ -0,0 +1,81 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Group, Post
+
+VERSION_KEY = 'version:{}'
+
+# Области, которые меняются вместе с постом.
+ALL_POSTS = 'posts'
+ALL_GROUPS = 'groups'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def following_scope(user_id):
+    return f'following:{user_id}'
+
+
+def current(*scopes):
+    """Версии областей данных для ключей кеша HTML-фрагментов и API.
+
+    Версия — случайная метка, а не счётчик: если кеш вытеснит её,
+    новая метка не совпадёт со старыми ключами.
+    """
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump(*scopes):
+    cache.set_many(
+        {VERSION_KEY.format(scope): uuid4().hex for scope in scopes}, None
+    )
+
+
+def bump_on_commit(*scopes):
+    """Поднимает версии после фиксации транзакции, в процессе запроса.
+
+    Не в воркере run_tasks: у него может быть другой кеш (LocMemCache
+    у каждого процесса свой), а версия должна смениться там, где её
+    читают веб-процессы.
+    """
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def post_scopes(post, previous_group_id=None):
+    scopes = [ALL_POSTS, author_scope(post.author_id), post_scope(post.pk)]
+    if post.group_id:
+        scopes.append(group_scope(post.group_id))
+    # Пост перенесли из группы: её лента тоже изменилась.
+    if previous_group_id:
+        scopes.append(group_scope(previous_group_id))
+    return scopes
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_on_commit(*post_scopes(instance))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    bump_on_commit(ALL_GROUPS, ALL_POSTS, group_scope(instance.pk))
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+from core import metrics
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = Counter()
+_last_flush = time.monotonic()
+_timer = None
+# База, для которой копятся просмотры.
+_database = None
+
+
+def record_view(post_id):
+    """Засчитывает просмотр поста в буфере процесса.
+
+    Буфер сбрасывается в базу, когда в нём набирается threshold просмотров
+    или с прошлого сброса прошло interval секунд. Во втором случае его
+    сбрасывает таймер, даже если новых просмотров больше не будет. При
+    падении процесса теряется не больше этого.
+    """
+    global _database
+    config = settings.VIEW_COUNTER
+    with _lock:
+        _database = connection.settings_dict['NAME']
+        _pending[post_id] += 1
+        due = (
+            sum(_pending.values()) >= config['threshold']
+            or time.monotonic() - _last_flush >= config['interval']
+        )
+        if not due:
+            schedule(config['interval'])
+    if due:
+        flush()
+
+
+def schedule(interval):
+    """Запускает таймер сброса, если он ещё не запущен. Вызывать под _lock."""
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(interval, run_timer)
+        _timer.daemon = True
+        _timer.start()
+
+
+def run_timer():
+    try:
+        flush_by_timer()
+    finally:
+        # У потока таймера своё соединение с базой.
+        connection.close()
+
+
+def flush_by_timer():
+    global _timer
+    with _lock:
+        _timer = None
+    flush()
+    with _lock:
+        # Сброс не удался: просмотры вернулись в буфер, повторим позже.
+        if _pending:
+            schedule(settings.VIEW_COUNTER['interval'])
+
+
+def pending(post_id):
+    """Просмотры поста, ещё не записанные в базу этим процессом."""
+    with _lock:
+        return _pending[post_id]
+
+
+def flush():
+    """Записывает накопленные просмотры в базу. Возвращает их число."""
+    global _last_flush
+    with _lock:
+        counts = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not counts:
+        return 0
+    try:
+        write_counts(counts)
+    except DatabaseError:
+        logger.exception('Не удалось сохранить просмотры постов')
+        # Вернём просмотры в буфер до следующей попытки.
+        with _lock:
+            _pending.update(counts)
+        return 0
+    total = sum(counts.values())
+    metrics.increment('post_views_flushed_total', total)
+    return total
+
+
+def write_counts(counts):
+    """Один UPDATE ... CASE на каждые batch постов."""
+    ids = sorted(counts)
+    batch = settings.VIEW_COUNTER['batch']
+    for start in range(0, len(ids), batch):
+        chunk = ids[start:start + batch]
+        increment = Case(
+            *(When(pk=pk, then=Value(counts[pk])) for pk in chunk),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        Post.objects.filter(pk__in=chunk).update(
+            views=F('views') + increment
+        )
+
+
+def flush_at_exit():
+    # Тестовый прогон к этому моменту уже удалил свою базу: просмотры
+    # из тестов не должны попасть в настоящую.
+    if _database == connection.settings_dict['NAME']:
+        flush()
+
+
+# При штатной остановке воркера буфер не пропадает.
+atexit.register(flush_at_exit)
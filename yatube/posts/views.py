@@ -1,46 +1,148 @@
+import os
+import re
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+
+from core.files import serve_file
+from core.ratelimit import ratelimit
 
+from . import (
+    follows, fragments, live, sitemaps, suggestions, syndication, versions,
+    view_counts
+)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
-from .utils import paginate_queryset
+from .lookups import get_group_or_404, get_user_or_404
+from .models import Post, User
+from .utils import notify_comment_added, notify_post_changed, paginate_cards
+
+SITEMAP_SHARD = re.compile(r'^sitemap-[a-z]+-\d+\.xml\.gz$')
+SITEMAP_CACHE_CONTROL = 'public, max-age=3600'
 
 
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    page_obj = paginate_queryset(request, post_list)
+    page_obj = paginate_cards(request, Post.objects.all())
     context = {
         'page_obj': page_obj,
+        'next_fragment': fragments.next_url(
+            reverse('posts:index_fragment'), page_obj
+        ),
+        'live_events': live.events_url('posts:index_events'),
+        'feed_url': reverse('posts:index_feed'),
     }
     return render(request, 'posts/index.html', context)
 
 
+def index_fragment(request):
+    return fragments.fragment_response(
+        request, Post.objects.all(), 'index', [versions.ALL_POSTS]
+    )
+
+
+def index_events(request):
+    return live.stream_response(request, [live.ALL_POSTS])
+
+
+def index_feed(request):
+    return syndication.feed_response(
+        request, Post.objects.all(), [versions.ALL_POSTS],
+        'Yatube: последние записи', reverse('posts:index')
+    )
+
+
+def popular(request):
+    posts = Post.objects.order_by('-popularity', '-pk')
+    context = {
+        'page_obj': paginate_cards(request, posts),
+        'popular': True,
+    }
+    return render(request, 'posts/popular.html', context)
+
+
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
-    page_obj = paginate_queryset(request, posts)
+    group = get_group_or_404(slug)
+    page_obj = paginate_cards(request, group.posts.all())
     context = {
         'group': group,
         'page_obj': page_obj,
+        'next_fragment': fragments.next_url(
+            reverse('posts:group_fragment', args=[slug]), page_obj
+        ),
+        'live_events': live.events_url('posts:group_events', slug),
+        'feed_url': reverse('posts:group_feed', args=[slug]),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+def group_fragment(request, slug):
+    group = get_group_or_404(slug)
+    return fragments.fragment_response(
+        request, group.posts.all(), f'group:{group.pk}',
+        [versions.group_scope(group.pk)], context={'group': group}
+    )
+
+
+def group_events(request, slug):
+    group = get_group_or_404(slug)
+    return live.stream_response(request, [live.group_channel(group.pk)])
+
+
+def group_feed(request, slug):
+    group = get_group_or_404(slug)
+    return syndication.feed_response(
+        request, group.posts.all(), [versions.group_scope(group.pk)],
+        group.title, reverse('posts:group_list', args=[slug]),
+        group.description
+    )
+
+
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
-    following = Follow.objects.filter(author=author).exists()
-    page_obj = paginate_queryset(request, posts)
+    author = get_user_or_404(username)
+    following = author.pk in follows.viewer_following_ids(request)
+    page_obj = paginate_cards(request, author.posts.all())
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following
+        'following': following,
+        'next_fragment': fragments.next_url(
+            reverse('posts:profile_fragment', args=[username]), page_obj
+        ),
+        'live_events': live.events_url('posts:profile_events', username),
+        'feed_url': reverse('posts:profile_feed', args=[username]),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def profile_fragment(request, username):
+    author = get_user_or_404(username)
+    return fragments.fragment_response(
+        request, author.posts.all(), f'profile:{author.pk}',
+        [versions.author_scope(author.pk)]
+    )
+
+
+def profile_events(request, username):
+    author = get_user_or_404(username)
+    return live.stream_response(request, [live.author_channel(author.pk)])
+
+
+def profile_feed(request, username):
+    author = get_user_or_404(username)
+    return syndication.feed_response(
+        request, author.posts.all(), [versions.author_scope(author.pk)],
+        f'Записи {author.get_full_name() or author.username}',
+        reverse('posts:profile', args=[username])
+    )
+
+
 def post_detail(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
+    view_counts.record_view(post.pk)
+    post.views += view_counts.pending(post.pk)
     comments = post.comments.select_related('author')
     form = CommentForm(request.POST or None)
     context = {
@@ -51,6 +153,7 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@ratelimit('post_create')
 @login_required
 def post_create(request):
     form = PostForm(
@@ -61,6 +164,7 @@ def post_create(request):
         new_post = form.save(commit=False)
         new_post.author = request.user
         new_post.save()
+        notify_post_changed(new_post, created=True)
         return redirect('posts:profile', username=request.user)
     context = {
         'form': form,
@@ -79,8 +183,22 @@ def post_edit(request, post_id):
     )
     if author != post.author:
         return redirect('posts:post_detail', post_id)
+    # is_valid() переписывает поля экземпляра, группу запоминаем до него.
+    previous_group_id = post.group_id
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        # Только поля формы: просмотры и популярность пишут
+        # posts.view_counts и posts.popularity, и правка не должна
+        # затирать то, что изменилось с загрузки поста.
+        post.save(update_fields=PostForm.Meta.fields)
+        form.save_m2m()
+        notify_post_changed(
+            post, created=False,
+            previous_group_id=(
+                previous_group_id
+                if previous_group_id != post.group_id else None
+            )
+        )
         return redirect('posts:post_detail', post_id)
     context = {
         'post': post,
@@ -90,6 +208,7 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@ratelimit('add_comment')
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -99,6 +218,7 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        notify_comment_added(comment)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -109,31 +229,113 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    user_follower = get_object_or_404(User, username=request.user)
-    posts_list = Post.objects.filter(author__following__user=user_follower)
-    page_obj = paginate_queryset(request, posts_list)
+    posts = follows.followed_posts(request.user)
+    page_obj = paginate_cards(request, posts)
     context = {
         'page_obj': page_obj,
+        'next_fragment': fragments.next_url(
+            reverse('posts:follow_fragment'), page_obj
+        ),
+        'live_events': live.events_url('posts:follow_events'),
+        'suggestions': suggestions.suggestions_for(
+            request.user, settings.FOLLOW_SUGGESTIONS['widget']
+        ),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def follow_fragment(request):
+    posts = follows.followed_posts(request.user)
+    return fragments.fragment_response(
+        request, posts, f'follow:{request.user.pk}',
+        [versions.ALL_POSTS, versions.following_scope(request.user.pk)],
+        private=True
+    )
+
+
+@login_required
+def follow_events(request):
+    return live.stream_response(request, [
+        live.author_channel(author_id)
+        for author_id in follows.viewer_following_ids(request)
+    ])
+
+
+@login_required
+def follow_suggestions(request):
+    top = settings.FOLLOW_SUGGESTIONS['top']
+    try:
+        limit = int(request.GET.get('limit', top))
+    except ValueError:
+        return JsonResponse({'error': 'limit должен быть числом'}, status=400)
+    limit = max(0, min(limit, top))
+    found = suggestions.suggestions_for(request.user, limit)
+    return JsonResponse({'suggestions': [
+        {
+            'username': suggestion.author.username,
+            'full_name': suggestion.author.get_full_name(),
+            'url': suggestion.author.get_absolute_url(),
+            'score': suggestion.score,
+        }
+        for suggestion in found
+    ]})
+
+
+@ratelimit('follow', methods=None)
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    following = Follow.objects.filter(
-        author=author, user=request.user
-    ).exists()
-    if author.id != request.user.id:
-        if not following:
-            Follow.objects.create(user=request.user, author=author)
-            return redirect('posts:follow_index', permanent=True)
+    author = get_user_or_404(username)
+    follows.follow(request.user, [author])
     return redirect('posts:follow_index', permanent=True)
 
 
+@ratelimit('follow', methods=None)
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    following = get_object_or_404(Follow, user=request.user, author=author)
-    following.delete()
+    author = get_user_or_404(username)
+    if not follows.unfollow(request.user, [author]):
+        raise Http404('Подписка не найдена')
     return redirect('posts:follow_index', permanent=True)
+
+
+@ratelimit('follow')
+@login_required
+@require_POST
+def follow_bulk(request):
+    usernames = set(request.POST.getlist('username'))
+    action = request.POST.get('action', 'follow')
+    if action not in ('follow', 'unfollow'):
+        return JsonResponse({'error': 'Неизвестное действие'}, status=400)
+    if len(usernames) > settings.FOLLOW_BULK_LIMIT:
+        return JsonResponse(
+            {'error': f'Не больше {settings.FOLLOW_BULK_LIMIT} авторов'},
+            status=400
+        )
+    authors = list(User.objects.filter(username__in=usernames))
+    getattr(follows, action)(request.user, authors)
+    found = {author.username for author in authors}
+    return JsonResponse({
+        'following': sorted(follows.following_ids(request.user.pk)),
+        'missing': sorted(usernames - found),
+    })
+
+
+def sitemap_file(request, name, content_type):
+    """Файл карты сайта, заранее собранный manage.py build_sitemaps."""
+    fullpath = os.path.join(settings.SITEMAP_ROOT, name)
+    if not os.path.isfile(fullpath):
+        raise Http404
+    return serve_file(
+        request, fullpath, SITEMAP_CACHE_CONTROL, content_type=content_type
+    )
+
+
+def sitemap_index(request):
+    return sitemap_file(request, sitemaps.INDEX_NAME, 'application/xml')
+
+
+def sitemap_shard(request, name):
+    if not SITEMAP_SHARD.match(name):
+        raise Http404
+    return sitemap_file(request, name, 'application/gzip')
@@ -0,0 +1,54 @@
+// Подгружает следующие порции ленты вместо перехода по страницам.
+// Без JavaScript остаётся обычный пагинатор.
+(function () {
+  var sentinel = document.querySelector('[data-next-fragment]');
+  if (!sentinel || !('IntersectionObserver' in window)) {
+    return;
+  }
+  var pagination = document.querySelector('nav[aria-label="Page navigation"]');
+  if (pagination) {
+    pagination.remove();
+  }
+  var next = sentinel.dataset.nextFragment;
+  var loading = false;
+
+  function load() {
+    if (loading || !next) {
+      return;
+    }
+    loading = true;
+    fetch(next, {credentials: 'same-origin'})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        var cursor = response.headers.get('X-Next-Cursor');
+        var url = new URL(next, window.location.href);
+        if (cursor) {
+          url.searchParams.set('cursor', cursor);
+          next = url.pathname + url.search;
+        } else {
+          next = null;
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        sentinel.insertAdjacentHTML('beforebegin', '<hr>' + html);
+        loading = false;
+        if (!next) {
+          observer.disconnect();
+          sentinel.remove();
+        }
+      })
+      .catch(function () {
+        loading = false;
+      });
+  }
+
+  var observer = new IntersectionObserver(function (entries) {
+    if (entries[0].isIntersecting) {
+      load();
+    }
+  }, {rootMargin: '600px'});
+  observer.observe(sentinel);
+})();
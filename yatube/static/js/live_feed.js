@@ -0,0 +1,21 @@
+// Показывает плашку о новых постах по событиям сервера (SSE).
+(function () {
+  var banner = document.querySelector('[data-live-events]');
+  if (!banner || !('EventSource' in window)) {
+    return;
+  }
+  var counter = banner.querySelector('.live-count');
+  var seen = {};
+  var count = 0;
+  var source = new EventSource(banner.dataset.liveEvents);
+  source.addEventListener('post', function (event) {
+    var post = JSON.parse(event.data);
+    if (seen[post.id]) {
+      return;
+    }
+    seen[post.id] = true;
+    count += 1;
+    counter.textContent = count;
+    banner.classList.remove('d-none');
+  });
+})();
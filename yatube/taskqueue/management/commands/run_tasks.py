@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from taskqueue.queue import claim_tasks, execute
+
+# Соединения родителя, доставшиеся дочернему процессу при fork.
+INHERITED_CONNECTIONS = []
+
+
+def init_worker():
+    """Отвязывает дочерний процесс от соединений родителя.
+
+    После fork объекты соединений указывают на сокеты и файлы родителя:
+    закрыть их здесь значит оборвать его сессию (в Postgres) или
+    испортить состояние SQLite. Поэтому соединения не закрываются, а
+    забываются, и ссылки на них хранятся до выхода процесса, чтобы их
+    не закрыл сборщик мусора. Первый запрос откроет своё соединение.
+    """
+    for connection in connections.all():
+        if connection.connection is not None:
+            INHERITED_CONNECTIONS.append(connection.connection)
+            connection.connection = None
+
+
+def make_executor(pool, workers):
+    if pool == 'process':
+        return ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker
+        )
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def run_task(task_id):
+    try:
+        return execute(task_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди taskqueue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        with make_executor(options['pool'], workers) as executor:
+            while True:
+                claimed = claim_tasks(limit=workers * 2)
+                if claimed:
+                    statuses = list(executor.map(run_task, claimed))
+                    self.stdout.write(
+                        f'Выполнено задач: {len(statuses)}, '
+                        f'с ошибкой: {statuses.count("failed")}'
+                    )
+                    continue
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['sleep'])
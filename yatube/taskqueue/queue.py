@@ -0,0 +1,140 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def register(name):
+    """Регистрирует функцию как обработчик задач с именем name."""
+    def decorator(func):
+        HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=0, key=None, delay=0):
+    if name not in HANDLERS:
+        raise KeyError(f'Обработчик задачи {name!r} не зарегистрирован')
+    if settings.TASKS_EAGER:
+        HANDLERS[name](**(payload or {}))
+        return None
+    task = Task(
+        name=name,
+        payload=json.dumps(payload or {}),
+        priority=priority,
+        idempotency_key=key,
+        max_attempts=settings.TASKS_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    try:
+        with transaction.atomic():
+            task.save()
+    except IntegrityError:
+        # Такая же задача уже ждёт в очереди.
+        return Task.objects.filter(
+            idempotency_key=key, status=Task.PENDING
+        ).first()
+    return task
+
+
+def enqueue_on_commit(name, payload=None, priority=0, key=None):
+    """Ставит задачу в очередь после фиксации текущей транзакции."""
+    transaction.on_commit(
+        lambda: enqueue(name, payload, priority=priority, key=key)
+    )
+
+
+def claim_tasks(limit):
+    """Забирает до limit готовых задач, помечая их как выполняемые.
+
+    Задачи, зависшие в статусе running дольше TASKS_LEASE секунд
+    (например, после падения воркера), забираются повторно. Такой
+    повтор считается попыткой: задача, которая роняет или вешает
+    воркер, после max_attempts помечается failed, а не крутится вечно.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.TASKS_LEASE)
+    ready = Q(status=Task.PENDING, run_at__lte=now) | Q(
+        status=Task.RUNNING, started__lt=stale
+    )
+    claimed = []
+    for task in Task.objects.filter(ready)[:limit]:
+        current = Task.objects.filter(
+            pk=task.pk, status=task.status, started=task.started
+        )
+        if task.status == Task.PENDING:
+            updated = current.update(status=Task.RUNNING, started=now)
+        else:
+            attempts = task.attempts + 1
+            if attempts >= task.max_attempts:
+                current.update(
+                    status=Task.FAILED, attempts=attempts,
+                    last_error='Истёк срок аренды: воркер не завершил задачу'
+                )
+                continue
+            updated = current.update(
+                status=Task.RUNNING, started=now, attempts=attempts
+            )
+        if updated:
+            claimed.append(task.pk)
+    return claimed
+
+
+def execute(task_id):
+    """Выполняет задачу и записывает результат. Возвращает новый статус.
+
+    Результат пишется только пока задача принадлежит этому запуску:
+    если аренду перехватил другой воркер, его состояние не затирается.
+    """
+    task = Task.objects.get(pk=task_id)
+    try:
+        HANDLERS[task.name](**json.loads(task.payload))
+    except Exception:
+        logger.exception(
+            'Задача %s #%s завершилась ошибкой', task.name, task.pk
+        )
+        return _retry_or_fail(task, traceback.format_exc())
+    _owned(task).update(status=Task.DONE)
+    return Task.DONE
+
+
+def _owned(task):
+    return Task.objects.filter(
+        pk=task.pk, status=Task.RUNNING, started=task.started
+    )
+
+
+def _retry_or_fail(task, error):
+    attempts = task.attempts + 1
+    if attempts >= task.max_attempts:
+        _owned(task).update(
+            status=Task.FAILED, attempts=attempts, last_error=error
+        )
+        return Task.FAILED
+    backoff = timedelta(seconds=settings.TASKS_RETRY_DELAY * 2 ** attempts)
+    try:
+        with transaction.atomic():
+            _owned(task).update(
+                status=Task.PENDING,
+                attempts=attempts,
+                last_error=error,
+                run_at=timezone.now() + backoff,
+            )
+    except IntegrityError:
+        # Повтор поглощается такой же задачей, уже стоящей в очереди.
+        _owned(task).update(
+            status=Task.DONE, attempts=attempts, last_error=error
+        )
+        return Task.DONE
+    return Task.PENDING
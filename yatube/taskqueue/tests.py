@@ -0,0 +1,124 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from .management.commands.run_tasks import (
+    INHERITED_CONNECTIONS, make_executor,
+)
+from .models import Task
+from .queue import HANDLERS, claim_tasks, enqueue, execute, register
+
+CALLS = []
+
+
+@register('tests.record')
+def record(value):
+    CALLS.append(value)
+
+
+@register('tests.broken')
+def broken():
+    raise ValueError('Сломанная задача')
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_task_runs_and_marks_done(self):
+        task = enqueue('tests.record', {'value': 1})
+        self.assertEqual(claim_tasks(limit=10), [task.pk])
+        self.assertEqual(execute(task.pk), Task.DONE)
+        self.assertEqual(CALLS, [1])
+        # Выполненная задача повторно не забирается
+        self.assertEqual(claim_tasks(limit=10), [])
+
+    def test_claim_respects_priority(self):
+        low = enqueue('tests.record', {'value': 'low'})
+        high = enqueue('tests.record', {'value': 'high'}, priority=5)
+        self.assertEqual(claim_tasks(limit=10), [high.pk, low.pk])
+
+    def test_idempotency_key_deduplicates_pending_tasks(self):
+        first = enqueue('tests.record', {'value': 1}, key='same')
+        second = enqueue('tests.record', {'value': 2}, key='same')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+        claim_tasks(limit=10)
+        execute(first.pk)
+        # После выполнения ключ снова можно использовать
+        enqueue('tests.record', {'value': 3}, key='same')
+        self.assertEqual(Task.objects.count(), 2)
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2)
+    def test_failed_task_is_retried_with_backoff(self):
+        task = enqueue('tests.broken')
+        claim_tasks(limit=10)
+        self.assertEqual(execute(task.pk), Task.PENDING)
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 1)
+        self.assertIn('Сломанная задача', task.last_error)
+        # Повтор откладывается и сразу не забирается
+        self.assertEqual(claim_tasks(limit=10), [])
+        Task.objects.filter(pk=task.pk).update(run_at=task.created)
+        claim_tasks(limit=10)
+        self.assertEqual(execute(task.pk), Task.FAILED)
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2)
+    def test_stale_lease_counts_as_attempt(self):
+        task = enqueue('tests.record', {'value': 1})
+        claim_tasks(limit=10)
+        started = Task.objects.get(pk=task.pk).started
+        expired = started - timedelta(seconds=settings.TASKS_LEASE + 1)
+        Task.objects.filter(pk=task.pk).update(started=expired)
+        self.assertEqual(claim_tasks(limit=10), [task.pk])
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 1)
+
+        # Воркер, у которого перехватили аренду, не затирает статус.
+        stale = Task.objects.get(pk=task.pk)
+        stale.started = expired
+        with mock.patch.object(Task.objects, 'get', return_value=stale):
+            self.assertEqual(execute(task.pk), Task.DONE)
+        self.assertEqual(
+            Task.objects.get(pk=task.pk).status, Task.RUNNING
+        )
+
+        Task.objects.filter(pk=task.pk).update(started=expired)
+        self.assertEqual(claim_tasks(limit=10), [])
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_immediately(self):
+        enqueue('tests.record', {'value': 'eager'})
+        self.assertEqual(CALLS, ['eager'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_unknown_task_is_rejected(self):
+        self.assertNotIn('tests.missing', HANDLERS)
+        with self.assertRaises(KeyError):
+            enqueue('tests.missing')
+
+
+def child_connection_state(parent_id):
+    """Выполняется в дочернем процессе пула."""
+    return (
+        connection.connection is None,
+        [id(inherited) for inherited in INHERITED_CONNECTIONS] == [parent_id],
+    )
+
+
+class ProcessPoolTest(TestCase):
+    # Дочерний процесс не пользуется соединением родителя и не закрывает его
+    def test_workers_drop_inherited_connection(self):
+        Task.objects.exists()
+        parent = connection.connection
+        with make_executor('process', 1) as executor:
+            state = executor.submit(child_connection_state, id(parent))
+            self.assertEqual(state.result(), (True, True))
+        self.assertIs(connection.connection, parent)
+        self.assertFalse(Task.objects.exists())
@@ -1,11 +1,40 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.contrib.sites.shortcuts import get_current_site
+
+from core.mail import PRIORITY
+from taskqueue.queue import enqueue
 
 User = get_user_model()
 
+PASSWORD_RESET_TASK = 'users.password_reset'
+
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         User = get_user_model()
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class AsyncPasswordResetForm(PasswordResetForm):
+    """Сброс пароля, который ищет пользователя и пишет письмо в фоне.
+
+    Запрос только ставит задачу в очередь, поэтому отвечает одинаково
+    быстро для известных и неизвестных адресов: по времени ответа
+    нельзя узнать, зарегистрирован ли адрес.
+    """
+
+    def save(self, domain_override=None, use_https=False, request=None,
+             **kwargs):
+        kwargs.pop('token_generator', None)
+        if domain_override is None:
+            domain_override = get_current_site(request).domain
+        enqueue(PASSWORD_RESET_TASK, {
+            'email': self.cleaned_data['email'],
+            'options': {
+                'domain_override': domain_override,
+                'use_https': use_https,
+                **kwargs,
+            },
+        }, priority=PRIORITY)
@@ -0,0 +1,12 @@
+from django.contrib.auth.forms import PasswordResetForm
+
+from taskqueue.queue import register
+
+from .forms import PASSWORD_RESET_TASK
+
+
+@register(PASSWORD_RESET_TASK)
+def password_reset(email, options):
+    form = PasswordResetForm({'email': email})
+    if form.is_valid():
+        form.save(**options)
@@ -0,0 +1,83 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.mail import close_delivery_connection
+from taskqueue.models import Task
+from taskqueue.queue import claim_tasks, execute
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class PasswordResetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(
+            username='user', email='user@yatube.test', password='secret'
+        )
+
+    def tearDown(self):
+        close_delivery_connection()
+
+    def reset(self, email):
+        return self.client.post(
+            reverse('users:password_reset'), {'email': email}
+        )
+
+    def run_queue(self):
+        while True:
+            claimed = claim_tasks(limit=10)
+            if not claimed:
+                return
+            for task_id in claimed:
+                self.assertEqual(execute(task_id), Task.DONE)
+
+    def test_request_only_enqueues(self):
+        for email in ('user@yatube.test', 'nobody@yatube.test'):
+            response = self.reset(email)
+            self.assertRedirects(response, reverse('password_reset_done'))
+        self.assertEqual(mail.outbox, [])
+        tasks = Task.objects.order_by('pk')
+        # Известный и неизвестный адрес стоят запросу одинаково.
+        self.assertEqual(
+            [task.name for task in tasks], ['users.password_reset'] * 2
+        )
+        self.assertEqual(
+            json.loads(tasks[0].payload)['options']['domain_override'],
+            'testserver'
+        )
+
+    def test_worker_sends_reset_link(self):
+        self.reset('user@yatube.test')
+        self.reset('nobody@yatube.test')
+        self.run_queue()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@yatube.test'])
+        self.assertIn('http://testserver/auth/reset/', mail.outbox[0].body)
+
+
+@override_settings(RATELIMITS={'login': '2/m'})
+class LoginRateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def login(self):
+        return self.client.post(
+            reverse('users:login'), {'username': 'user', 'password': 'x'}
+        )
+
+    def test_login_attempts_are_limited(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.login().status_code, 429)
+        self.assertEqual(
+            self.client.get(reverse('users:login')).status_code, 200
+        )
@@ -1,17 +1,26 @@
 from django.contrib.auth.views import LoginView, LogoutView, PasswordResetView
 from django.urls import path
 
+from core.ratelimit import ratelimit
+
 from . import views
+from .forms import AsyncPasswordResetForm
 
 app_name = 'users'
 
 urlpatterns = [
     path('logout/', LogoutView.as_view
          (template_name='users/logged_out.html'), name='logout'),
-    path('signup/', views.SignUp.as_view(), name='signup'),
-    path('login/', LoginView.as_view(
-        template_name='users/login.html'), name='login'),
-    path('password_reset/', PasswordResetView.as_view
-         (template_name='users/password_reset_form.html'),
-         name='password_reset'),
+    path('signup/', ratelimit('signup')(views.SignUp.as_view()),
+         name='signup'),
+    path('login/', ratelimit('login')(LoginView.as_view(
+        template_name='users/login.html')), name='login'),
+    path(
+        'password_reset/',
+        ratelimit('password_reset')(PasswordResetView.as_view(
+            template_name='users/password_reset_form.html',
+            form_class=AsyncPasswordResetForm,
+        )),
+        name='password_reset'
+    ),
 ]
@@ -1,13 +1,30 @@
 import os
+from importlib.util import find_spec
 
 POSTS_PER_PAGE = 10
+FOLLOW_BULK_LIMIT = 100
+
+
+def user_url(user):
+    # Импорт внутри функции: настройки не должны загружать код приложений.
+    from posts.links import user_url
+
+    return user_url(user)
+
+
+ABSOLUTE_URL_OVERRIDES = {
+    'auth.user': user_url,
+}
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь задач, а отправляет их воркер run_tasks
+# через EMAIL_DELIVERY_BACKEND (в проде — SMTP).
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -15,12 +32,162 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Адрес сайта для ссылок вне запроса: карта сайта, письма.
+SITE_URL = 'http://localhost:8000'
+# Отдавать картинки постов и миниатюры из приложения (core.views.serve_media).
+SERVE_MEDIA = True
+MEDIA_SERVE_DIRS = ('posts/', 'cache/')
+# None — приложение отдаёт файл само (Range, ETag, wsgi.file_wrapper);
+# 'x-accel-redirect' — nginx по внутреннему адресу MEDIA_ACCEL_PREFIX;
+# 'x-sendfile' — Apache/lighttpd по полному пути к файлу.
+MEDIA_ACCEL = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Статические копии страниц для анонимных посетителей (manage.py prerender).
+PRERENDER_ROOT = os.path.join(BASE_DIR, 'prerendered')
+PRERENDER_PAGES = 3
+# Карта сайта (manage.py build_sitemaps): файлы, адрес сайта для <loc>,
+# адресов в шарде (не больше 50 000 по протоколу) и строк за запрос.
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAPS = {
+    'base_url': SITE_URL,
+    'shard_size': 50000,
+    'chunk': 2000,
+}
+
+# Очередь фоновых задач (приложение taskqueue).
+# При TASKS_EAGER задачи выполняются сразу, без воркера.
+TASKS_EAGER = False
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 5
+TASKS_LEASE = 300
+
+# Кеш групп и пользователей по slug/username: LRU в памяти процесса
+# (maxsize записей, ttl секунд) поверх общего кеша (timeout секунд).
+LOOKUP_CACHE = {
+    'maxsize': 1024,
+    'ttl': 60,
+    'timeout': 60 * 10,
+}
+
+# Просмотры постов копятся в памяти процесса и записываются в базу,
+# когда их набирается threshold или прошло interval секунд;
+# один UPDATE обновляет до batch постов.
+VIEW_COUNTER = {
+    'threshold': 100,
+    'interval': 10,
+    'batch': 500,
+}
+
+# Вес комментария, просмотра и подписчика автора в оценке популярности;
+# decay — за сколько секунд свежести вес поста «стоит» в 10 раз больше.
+POPULARITY = {
+    'comments': 5,
+    'views': 0.1,
+    'followers': 1,
+    'decay': 12 * 60 * 60,
+    'batch': 500,
+}
+
+# Рекомендации «на кого подписаться»: top на пользователя хранит команда
+# recommend_follows (пачками по chunk пользователей), widget показывается
+# на странице подписок.
+FOLLOW_SUGGESTIONS = {
+    'top': 10,
+    'chunk': 1000,
+    'widget': 5,
+}
+
+# Сколько секунд кешируются порции лент для бесконечной прокрутки.
+FEED_FRAGMENT_TIMEOUT = 60
+
+# Atom/RSS: число записей, слов в заголовке записи, время жизни
+# документа в кеше (он сбрасывается и раньше — с новым постом) и
+# max-age для прокси и читалок.
+FEEDS = {
+    'items': 20,
+    'title_words': 10,
+    'timeout': 60 * 60,
+    'max_age': 60,
+}
+
+# Брокер событий о новых постах для SSE. LocalBroker работает внутри
+# одного процесса; CacheBroker — через общий кеш (Redis, memcached)
+# для нескольких процессов и узлов. Переподключение с Last-Event-ID
+# досылает не больше backlog событий.
+EVENT_BROKER = {
+    'BACKEND': 'core.events.CacheBroker',
+    'history': 60,
+    'poll': 1,
+    'backlog': 1000,
+}
+# Потоки SSE держат соединение (и поток сервера) минутами, поэтому
+# включаются явно, когда сервер к этому готов. Пинг раз в heartbeat
+# секунд, поток живёт max_age секунд, после чего браузер
+# переподключается через retry секунд.
+LIVE_EVENTS = {
+    'enabled': False,
+    'heartbeat': 15,
+    'max_age': 5 * 60,
+    'retry': 3,
+}
+
+# Ограничение частоты записи (core.ratelimit): «запросов/период» (s, m,
+# h, d) на пользователя, а для анонимов — на IP. Счётчики лежат в общем
+# кеше, поэтому в проде это должен быть memcached или Redis.
+RATELIMITS = {
+    'post_create': '20/m',
+    'add_comment': '30/m',
+    'follow': '60/m',
+    'api_batch': '10/m',
+    'signup': '10/h',
+    'password_reset': '10/h',
+    'login': '10/m',
+}
+# Адреса и сети обратных прокси перед приложением. Только для запросов
+# от них IP клиента берётся из X-Forwarded-For или X-Real-IP; иначе эти
+# заголовки может подделать кто угодно.
+RATELIMIT_TRUSTED_PROXIES = []
+
+# Дайджесты уведомлений (manage.py send_digests): писем за одну
+# отправку, строк за запрос, событий в одном письме и сколько дней
+# хранить отправленные уведомления.
+NOTIFICATIONS = {
+    'batch': 100,
+    'chunk': 2000,
+    'events_per_email': 20,
+    'keep_days': 30,
+}
+
+# JSON API: наибольший limit списка, время жизни ответов в кеше
+# (ответы сбрасываются и раньше — при изменении данных) и наибольший
+# размер пачки в пакетных ручках.
+API = {
+    'max_limit': 100,
+    'timeout': 60 * 10,
+    'batch_limit': 100,
+}
+
+# Миниатюры картинок постов для srcset (тег responsive_image).
+# Добавьте 'AVIF', когда его будут поддерживать sorl-thumbnail и Pillow.
+THUMBNAIL_SRCSET_WIDTHS = (320, 640, 960)
+THUMBNAIL_SRCSET_FORMATS = ('WEBP',)
+THUMBNAIL_SRCSET_RATIO = (960, 339)
+THUMBNAIL_SRCSET_SIZES = '(max-width: 1000px) 100vw, 960px'
+# Предел размера кеша миниатюр для manage.py media_gc и возраст файла,
+# моложе которого он не считается сиротой.
+THUMBNAIL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+MEDIA_GC_GRACE = 60 * 60
 
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Сессия читается из кеша, а в базу идёт только при промахе: так отказ
+# 429 (core.ratelimit) и прочие запросы с сессией не стоят запроса к
+# базе. На нескольких процессах кеш должен быть общим, иначе выход в
+# одном процессе не сбросит сессию в кеше другого.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
@@ -52,6 +219,9 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'taskqueue.apps.TaskQueueConfig',
+    'api.apps.ApiConfig',
+    'notifications.apps.NotificationsConfig',
     'sorl.thumbnail',
 ]
 
@@ -121,6 +291,34 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Хеширование паролей (core.hashers). Новые хеши считает первый
+# алгоритм, чья библиотека установлена: argon2-cffi, bcrypt или
+# встроенный PBKDF2. Остальные проверяют старые хеши; после входа
+# пароль перехешируется, если алгоритм или стоимость изменились.
+# Стоимость подбирайте командой benchmark_login. core.hashers хеширует
+# Argon2id (Django 2.2 — Argon2i, такие хеши обновятся при входе), и
+# параметры — профиль OWASP для Argon2id (19 МиБ, 2 прохода, 1 поток):
+# на вход уходят десятки миллисекунд и 19 МиБ, а не 100 МиБ на каждый
+# параллельный логин.
+PASSWORD_HASHING = {
+    'argon2': {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1},
+    'bcrypt': {'rounds': 12},
+    'pbkdf2': {'iterations': 150000},
+}
+PASSWORD_HASHERS = [
+    hasher for hasher, library in (
+        ('core.hashers.Argon2PasswordHasher', 'argon2'),
+        ('core.hashers.BCryptSHA256PasswordHasher', 'bcrypt'),
+        ('core.hashers.PBKDF2PasswordHasher', None),
+        ('django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher', None),
+    )
+    if library is None or find_spec(library) is not None
+]
+# manage.py test ставит впереди дешёвый MD5 (core.testing), pytest —
+# фикстурой из conftest.py; в настройках проекта его нет.
+TEST_RUNNER = 'core.testing.FastHashingRunner'
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
@@ -139,3 +337,11 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# collectstatic добавляет хеш в имена файлов и пишет рядом .gz
+# (и .br, если установлен пакет Brotli).
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Отдавать STATIC_ROOT из приложения, если нет фронт-сервера.
+SERVE_STATIC = True
+# Время кеширования статики без хеша в имени, в секундах.
+STATIC_MAX_AGE = 60 * 60